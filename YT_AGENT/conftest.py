@@ -0,0 +1,40 @@
+"""
+pytest configuration for the YouTube Course Generator Agent tests.
+
+A single in-memory YouTubeAgent is shared by test_agent.py and test_custom_url.py,
+so the API clients are built once per run:
+
+    pytest                                                   # sample playlists only
+    pytest --playlist-url "https://www.youtube.com/playlist?list=PLxxxxx"
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add current directory to path for imports
+sys.path.append(str(Path(__file__).parent))
+
+from test_agent import load_api_keys, make_agent
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--playlist-url", action="append", default=[],
+        help="Playlist URL for test_custom_url.py (repeatable)"
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "playlist_url" in metafunc.fixturenames:
+        metafunc.parametrize("playlist_url", metafunc.config.getoption("playlist_url"))
+
+
+@pytest.fixture(scope="session")
+def agent():
+    """YouTubeAgent shared by every test; skips when the API keys aren't configured."""
+    youtube_api_keys, gemini_api_key = load_api_keys()
+    if not youtube_api_keys or not gemini_api_key:
+        pytest.skip("YOUTUBE_API_KEY(S) and GOOGLE_AI_API_KEY must be set")
+    return make_agent(youtube_api_keys, gemini_api_key)
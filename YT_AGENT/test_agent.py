@@ -7,92 +7,145 @@ This script runs basic tests to ensure the agent is working correctly.
 
 import os
 import sys
-import json
+import asyncio
 from pathlib import Path
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from yt_agent import YouTubeAgent
 from dotenv import load_dotenv
 
-def test_agent():
+# Small public playlists exercised concurrently by the test
+TEST_PLAYLISTS = [
+    "https://www.youtube.com/playlist?list=PLZlA0Gpn_vH_uZs4vJMIhcinABSTUH2bY",
+    "https://www.youtube.com/playlist?list=PLWKjhJtqVAbleDe3_ZA8h3AO2rXar-q2V",
+    "https://www.youtube.com/playlist?list=PLrAXtmRdnEQy6nuLMfqVYjeQsS2WY1-3k",
+]
+MAX_VIDEOS = 3
+
+async def check_playlist(agent, test_playlist, max_videos=MAX_VIDEOS):
+    """Check the YouTube agent against a single playlist."""
+    try:
+        print(f"🎯 Testing with playlist: {test_playlist}")
+        
+        # Process playlist
+        _, course_data = await agent.process_playlist_async(test_playlist, max_videos)
+        
+        # Verify the in-memory course (the agent runs without an output directory)
+        if not course_data:
+            print("❌ No course data generated")
+            return False
+        
+        print("✅ Course data generated in memory")
+        
+        # Basic structure validation
+        required_keys = ['course', 'modules', 'assignments', 'finalExam', 'metadata']
+        missing_keys = [key for key in required_keys if key not in course_data]
+        
+        if missing_keys:
+            print(f"❌ Missing keys in output: {missing_keys}")
+            return False
+        
+        print("✅ JSON structure is valid")
+        
+        # Print summary
+        course = course_data.get('course', {})
+        modules = course_data.get('modules', [])
+        lesson_counts = [len(m.get('lessons') or ()) for m in modules]
+        
+        print(f"✅ Generated course: {course.get('title', 'N/A')}")
+        print(f"✅ Modules created: {len(modules)}")
+        print(f"✅ Total lessons: {sum(lesson_counts)}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Test failed for {test_playlist} with error: {e}")
+        return False
+
+async def run_playlist_tests(agent):
+    """Run all playlist tests concurrently on one shared agent."""
+    return await asyncio.gather(
+        *(check_playlist(agent, url) for url in TEST_PLAYLISTS),
+        return_exceptions=True
+    )
+
+def load_api_keys():
+    """Load the YouTube key list and the Gemini key from the environment / ../.env."""
+    load_dotenv("../.env")
+    
+    youtube_api_keys = [k.strip() for k in os.getenv('YOUTUBE_API_KEYS', '').split(',') if k.strip()]
+    if not youtube_api_keys and os.getenv('YOUTUBE_API_KEY'):
+        youtube_api_keys = [os.getenv('YOUTUBE_API_KEY')]
+    return youtube_api_keys, os.getenv('GOOGLE_AI_API_KEY')
+
+def make_cache():
+    """Redis (db 1) when a server answers, otherwise the on-disk SQLiteCache."""
+    # Imported lazily; yt_agent pulls in the heavy Google client libraries
+    from yt_agent import SQLiteCache
+    
+    if redis is not None:
+        try:
+            cache = redis.Redis(db=1)
+            cache.ping()
+            return cache
+        except redis.exceptions.RedisError:
+            pass
+    return SQLiteCache()
+
+def make_agent(youtube_api_keys, gemini_api_key):
+    """Build an in-memory agent, reusing cached YouTube API and Gemini responses."""
+    from yt_agent import YouTubeAgent
+    
+    return YouTubeAgent(youtube_api_keys, gemini_api_key, None, cache=make_cache())
+
+def run_agent_tests():
     """Test the YouTube agent with sample data."""
     print("🧪 Testing YouTube Course Generator Agent...")
     print("=" * 50)
     
-    # Load environment variables
-    load_dotenv("../.env")
-    
     # Check API keys
-    youtube_api_key = os.getenv('YOUTUBE_API_KEY')
-    gemini_api_key = os.getenv('GOOGLE_AI_API_KEY')
+    youtube_api_keys, gemini_api_key = load_api_keys()
     
-    if not youtube_api_key or not gemini_api_key:
+    if not youtube_api_keys or not gemini_api_key:
         print("❌ Missing API keys. Please set:")
-        print("  - YOUTUBE_API_KEY")
+        print("  - YOUTUBE_API_KEY (or comma-separated YOUTUBE_API_KEYS)")
         print("  - GOOGLE_AI_API_KEY")
         return False
     
     print("✅ API keys found")
-    
-    # Test with a small public playlist
-    test_playlist = "https://www.youtube.com/playlist?list=PLZlA0Gpn_vH_uZs4vJMIhcinABSTUH2bY"
-    max_videos = 3
+    print(f"📊 Playlists: {len(TEST_PLAYLISTS)}, max videos each: {MAX_VIDEOS}")
     
     try:
-        print(f"🎯 Testing with playlist: {test_playlist}")
-        print(f"📊 Max videos: {max_videos}")
-        
-        # Initialize agent
-        agent = YouTubeAgent(youtube_api_key, gemini_api_key, "test_output")
-        
-        # Process playlist
-        output_file = agent.process_playlist(test_playlist, max_videos)
-        
-        # Verify output file
-        if os.path.exists(output_file):
-            print(f"✅ Output file created: {output_file}")
-            
-            # Load and verify JSON structure
-            with open(output_file, 'r', encoding='utf-8') as f:
-                course_data = json.load(f)
-            
-            # Basic structure validation
-            required_keys = ['course', 'modules', 'assignments', 'finalExam', 'metadata']
-            missing_keys = [key for key in required_keys if key not in course_data]
-            
-            if missing_keys:
-                print(f"❌ Missing keys in output: {missing_keys}")
-                return False
-            
-            print("✅ JSON structure is valid")
-            
-            # Print summary
-            course = course_data.get('course', {})
-            modules = course_data.get('modules', [])
-            
-            print(f"✅ Generated course: {course.get('title', 'N/A')}")
-            print(f"✅ Modules created: {len(modules)}")
-            print(f"✅ Total lessons: {sum(len(m.get('lessons', [])) for m in modules)}")
-            
-            # Clean up test file
-            os.remove(output_file)
-            print("🧹 Test file cleaned up")
-            
-            return True
-            
-        else:
-            print("❌ Output file not created")
-            return False
-            
+        # Initialize one agent shared by all playlist tests
+        agent = make_agent(youtube_api_keys, gemini_api_key)
     except Exception as e:
         print(f"❌ Test failed with error: {e}")
         return False
+    
+    results = asyncio.run(run_playlist_tests(agent))
+    return all(result is True for result in results)
+
+def test_playlist_structure(agent):
+    """pytest entry point: every sample playlist yields a well-formed course."""
+    results = asyncio.run(run_playlist_tests(agent))
+    assert all(result is True for result in results)
 
 def main():
     """Run the test."""
-    success = test_agent()
+    # Use the faster libuv event loop when it's installed
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    success = run_agent_tests()
     
     if success:
         print("\n🎉 All tests passed! The agent is working correctly.")
@@ -3,20 +3,41 @@
 Custom URL Test Script for YouTube Course Generator Agent
 
 This script allows you to easily test the agent with any YouTube playlist URL.
+Run it without arguments for interactive prompts, or non-interactively:
+
+    python test_custom_url.py --url "https://www.youtube.com/playlist?list=PLxxxxx" --max 10 --yes
 """
 
 import os
+import re
 import sys
+import asyncio
+import argparse
 from pathlib import Path
 
 # Add current directory to path for imports
 sys.path.append(str(Path(__file__).parent))
 
-from yt_agent import YouTubeAgent
 from dotenv import load_dotenv
 
-def test_custom_url():
+# Matches the playlist ID in both /playlist?list=... and /watch?v=...&list=... URLs
+_PLAYLIST_RE = re.compile(r'[?&]list=([A-Za-z0-9_-]+)')
+
+def parse_args(argv=None):
+    """Parse command-line options; anything omitted is prompted for on a TTY."""
+    parser = argparse.ArgumentParser(description="Test the YouTube Course Generator Agent with a custom playlist URL")
+    parser.add_argument('--url', help='YouTube playlist URL')
+    parser.add_argument('--max', type=int, help='Max videos to process (default: 10)')
+    parser.add_argument('-y', '--yes', action='store_true', help='Skip the confirmation prompt')
+    parser.add_argument('--show-json', action='store_true', help='Print the course JSON structure')
+    return parser.parse_args(argv)
+
+def run_custom_url_test(args=None):
     """Test the agent with a custom URL."""
+    if args is None:
+        args = parse_args()
+    interactive = sys.stdin.isatty()
+    
     print("🧪 YouTube Course Generator - Custom URL Test")
     print("=" * 50)
     
@@ -24,84 +45,111 @@ def test_custom_url():
     load_dotenv("../.env")
     
     # Check API keys
-    youtube_api_key = os.getenv('YOUTUBE_API_KEY')
+    youtube_api_keys = [k.strip() for k in os.getenv('YOUTUBE_API_KEYS', '').split(',') if k.strip()]
+    if not youtube_api_keys and os.getenv('YOUTUBE_API_KEY'):
+        youtube_api_keys = [os.getenv('YOUTUBE_API_KEY')]
     gemini_api_key = os.getenv('GOOGLE_AI_API_KEY')
     
-    if not youtube_api_key or not gemini_api_key:
+    if not youtube_api_keys or not gemini_api_key:
         print("❌ Missing API keys. Please set:")
-        print("  - YOUTUBE_API_KEY")
+        print("  - YOUTUBE_API_KEY (or comma-separated YOUTUBE_API_KEYS)")
         print("  - GOOGLE_AI_API_KEY")
         return
     
-    # Get URL from user
-    print("\n📝 Enter your YouTube playlist URL:")
-    print("Examples:")
-    print("  - https://www.youtube.com/playlist?list=PLxxxxx")
-    print("  - https://www.youtube.com/watch?v=xxxxx&list=PLxxxxx")
-    print()
-    
-    playlist_url = input("Playlist URL: ").strip()
+    # Get URL from the command line or the user
+    playlist_url = (args.url or '').strip()
+    if not playlist_url and interactive:
+        print("\n📝 Enter your YouTube playlist URL:")
+        print("Examples:")
+        print("  - https://www.youtube.com/playlist?list=PLxxxxx")
+        print("  - https://www.youtube.com/watch?v=xxxxx&list=PLxxxxx")
+        print()
+        
+        playlist_url = input("Playlist URL: ").strip()
     
     if not playlist_url:
         print("❌ No URL provided. Exiting.")
         return
     
+    # Reject malformed URLs before spending any API quota
+    match = _PLAYLIST_RE.search(playlist_url)
+    if not match:
+        print("❌ Invalid playlist URL (expected a 'list=' parameter). Exiting.")
+        return
+    playlist_id = match.group(1)
+    
     # Get max videos
-    try:
-        max_videos_input = input("Max videos to process (default: 10): ").strip()
-        max_videos = int(max_videos_input) if max_videos_input else 10
-    except ValueError:
+    max_videos = args.max
+    if max_videos is None:
         max_videos = 10
-        print("⚠️  Invalid number, using default (10)")
+        if interactive and not args.url:
+            try:
+                max_videos_input = input("Max videos to process (default: 10): ").strip()
+                max_videos = int(max_videos_input) if max_videos_input else 10
+            except ValueError:
+                print("⚠️  Invalid number, using default (10)")
     
     # Confirm settings
     print(f"\n📋 Test Configuration:")
     print(f"   URL: {playlist_url}")
+    print(f"   Playlist ID: {playlist_id}")
     print(f"   Max Videos: {max_videos}")
     print(f"   Output: output/ directory")
     
-    proceed = input("\nProceed with test? (y/n): ").strip().lower()
-    if proceed != 'y':
-        print("❌ Test cancelled.")
-        return
+    if not args.yes:
+        if not interactive:
+            print("❌ Test cancelled. Pass --yes to run without confirmation.")
+            return
+        proceed = input("\nProceed with test? (y/n): ").strip().lower()
+        if proceed != 'y':
+            print("❌ Test cancelled.")
+            return
     
     try:
         print("\n🚀 Starting course generation...")
         print("-" * 60)
         
+        # Imported only when a run is confirmed; yt_agent pulls in the heavy Google client libraries
+        from yt_agent import YouTubeAgent
+        
         # Initialize agent
-        agent = YouTubeAgent(youtube_api_key, gemini_api_key, "output")
+        agent = YouTubeAgent(youtube_api_keys, gemini_api_key, "output")
         
         # Process playlist
-        output_file = agent.process_playlist(playlist_url, max_videos)
+        output_file, course_data = asyncio.run(agent.process_playlist_async(playlist_url, max_videos))
         
         print("\n" + "=" * 60)
         print("🎉 SUCCESS! Course generated successfully!")
         print(f"📁 Output file: {output_file}")
         
-        # Load and display summary
-        import json
-        with open(output_file, 'r', encoding='utf-8') as f:
-            course_data = json.load(f)
-        
+        # Display summary from the in-memory course data
         print(agent.get_course_summary(course_data))
         
         # Ask if user wants to see the JSON structure
-        show_json = input("\nShow JSON structure? (y/n): ").strip().lower()
-        if show_json == 'y':
+        show_json = args.show_json
+        if not show_json and interactive and not args.yes:
+            show_json = input("\nShow JSON structure? (y/n): ").strip().lower() == 'y'
+        if show_json:
             print("\n📊 Course JSON Structure:")
             print("-" * 30)
             course = course_data.get('course', {})
             modules = course_data.get('modules', [])
             assignments = course_data.get('assignments', [])
             
-            print(f"Course Title: {course.get('title')}")
-            print(f"Modules: {len(modules)}")
-            for i, module in enumerate(modules, 1):
-                lessons = module.get('lessons', [])
-                print(f"  Module {i}: {module.get('title')} ({len(lessons)} lessons)")
-            print(f"Assignments: {len(assignments)}")
-            print(f"Final Exam: {'Yes' if course_data.get('finalExam') else 'No'}")
+            lesson_counts = [len(m.get('lessons') or ()) for m in modules]
+            
+            # Build the whole listing first and write it out in one go
+            lines = [
+                f"Course Title: {course.get('title')}",
+                f"Modules: {len(modules)} ({sum(lesson_counts)} lessons)"
+            ]
+            lines.extend(
+                f"  Module {i}: {module.get('title')} ({count} lessons)"
+                for i, (module, count) in enumerate(zip(modules, lesson_counts), 1)
+            )
+            lines.append(f"Assignments: {len(assignments)}")
+            lines.append(f"Final Exam: {'Yes' if course_data.get('finalExam') else 'No'}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         
     except Exception as e:
         print(f"\n💥 ERROR: {e}")
@@ -110,5 +158,20 @@ def test_custom_url():
         print("  - API keys are correctly set")
         print("  - Internet connection is stable")
 
+def test_custom_playlist(agent, playlist_url):
+    """pytest entry point: generate a small course for each --playlist-url option."""
+    assert _PLAYLIST_RE.search(playlist_url), f"Invalid playlist URL: {playlist_url}"
+    
+    _, course_data = asyncio.run(agent.process_playlist_async(playlist_url, 3))
+    assert course_data.get('course')
+    assert course_data.get('modules')
+
 if __name__ == "__main__":
-    test_custom_url()
+    # Use the faster libuv event loop when it's installed
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    run_custom_url_test()
@@ -10,14 +10,24 @@ import sys
 import json
 import logging
 import re
-from typing import Dict, List, Optional, Any
+import asyncio
+import concurrent.futures
+import functools
+import copy
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 import uuid
 from urllib.parse import urlparse, parse_qs
 
+import httplib2
 import google.generativeai as genai
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 from dotenv import load_dotenv
 
 # Set up logging
@@ -31,126 +41,491 @@ logger = logging.getLogger(__name__)
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
     TRANSCRIPT_AVAILABLE = True
+    try:
+        # Lets transcript lookups run on our own pooled session instead of a new one per video
+        import requests
+        from youtube_transcript_api._transcripts import TranscriptListFetcher
+    except ImportError:
+        TranscriptListFetcher = None
 except ImportError:
     TRANSCRIPT_AVAILABLE = False
     logger.warning("youtube-transcript-api not available. Transcripts will be empty.")
 
+# Import orjson with fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Import rate limiter with fallback
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    AsyncLimiter = None
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON, using orjson when it's installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _find_json_span(text: str) -> Optional[str]:
+    """Return the first balanced {...} span in text, skipping braces inside string literals."""
+    start = text.find('{')
+    if start < 0:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def _json_dumps(obj: Any, indent: bool = False) -> str:
+    """Encode JSON to a str, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
+
+
+# Fallback patterns for pulling a JSON object out of a model response
+_JSON_CODE_BLOCK = re.compile(r'```json\s*(\{.*?\})\s*```', re.DOTALL)
+_JSON_GENERIC_BLOCK = re.compile(r'```\s*(\{.*?\})\s*```', re.DOTALL)
+_JSON_OBJECT = re.compile(r'\{.*?\}', re.DOTALL)
+_JSON_FENCE = re.compile(r'```json|```')
+
+# Used to build output filenames from course titles
+_SAFE_TITLE_RE = re.compile(r'[^\w\s-]')
+_TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+
+class SQLiteCache:
+    """Minimal Redis-compatible (get/setex) cache persisted in a local SQLite file.
+    
+    Lets repeated runs reuse YouTube and Gemini responses without a Redis server.
+    """
+    
+    def __init__(self, path: str = ".yt_cache.sqlite3"):
+        """Open (or create) the cache database at `path`, dropping expired entries."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # get() already ignores expired rows; purging them here keeps the file from growing
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+    
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        """Return the stored value, or None if it's missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def setex(self, key: str, ttl: int, value: Union[str, bytes]) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+
 
 class YouTubeExtractor:
     """Handles YouTube API operations and data extraction."""
     
-    def __init__(self, api_key: str):
-        """Initialize YouTube API client."""
-        self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+    def __init__(self, api_key: Union[str, List[str]], cache: Optional[Any] = None, cache_ttl: int = 24 * 3600,
+                 max_requests_per_second: float = 50, num_retries: int = 5):
+        """Initialize YouTube API client.
+        
+        `api_key` may be a list of keys; the client rotates to the next one when a key's quota is exhausted.
+        `cache` is any Redis-compatible client (get/setex), e.g. SQLiteCache, used to memoize
+        API responses and transcripts.
+        `num_retries` bounds the jittered exponential backoff on 429/5xx responses.
+        """
+        self.api_keys = [api_key] if isinstance(api_key, str) else list(api_key)
+        self._key_idx = 0
+        self._key_lock = threading.Lock()
+        self.api_key = self.api_keys[0]
+        self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.num_retries = num_retries
+        # Shared leaky bucket for the async fan-out so bursts stay under the API rate limit
+        self.limiter = AsyncLimiter(max_requests_per_second, 1.0) if AsyncLimiter else None
+        self._local = threading.local()
+        # Dedicated pool for the blocking API/transcript calls, so the async fan-out doesn't
+        # contend with (or get capped by) the loop's default executor
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix='yt-api')
+        self.read_cache = True
     
-    def extract_playlist_id(self, url: str) -> Optional[str]:
-        """Extract playlist ID from YouTube URL."""
-        parsed_url = urlparse(url)
-        if 'list' in parsed_url.query:
-            return parse_qs(parsed_url.query)['list'][0]
+    def refreshing(self) -> "YouTubeExtractor":
+        """Return a view of this extractor that ignores cached data but still refreshes the cache."""
+        extractor = copy.copy(self)
+        extractor.read_cache = False
+        return extractor
+    
+    def _thread_http(self) -> httplib2.Http:
+        """Get an Http instance for the current thread (httplib2 is not thread-safe).
+        
+        Built with build_http, like the client build() creates, so calls keep its socket
+        timeout instead of hanging on a stalled connection.
+        """
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = build_http()
+        return http
+    
+    def _thread_session(self) -> "requests.Session":
+        """Get a keep-alive requests session for the current thread's transcript lookups."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+    
+    async def _run_blocking(self, func: Any, *args, **kwargs) -> Any:
+        """Run a blocking client call on the extractor's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+    
+    def _call_youtube_api(self, endpoint: str, **params) -> Dict:
+        """Execute a YouTube Data API list call, consulting the response cache first."""
+        cached = self._cache_get(endpoint, params)
+        if cached is not None:
+            return cached
+        
+        attempts_left = len(self.api_keys)
+        while True:
+            youtube = self.youtube
+            try:
+                # googleapiclient retries 429/5xx itself, sleeping random() * 2**attempt between tries
+                response = getattr(youtube, endpoint)().list(**params).execute(
+                    http=self._thread_http(),
+                    num_retries=self.num_retries
+                )
+                break
+            except HttpError as e:
+                attempts_left -= 1
+                if attempts_left <= 0 or not self._is_quota_exceeded(e):
+                    raise
+                self._rotate_api_key(youtube)
+        
+        self._cache_set(endpoint, params, response)
+        return response
+    
+    def _batch_youtube_api(self, calls: List[Tuple[str, Dict]]) -> List[Dict]:
+        """Execute several (endpoint, params) list calls in one batched HTTP request.
+        
+        Results come back in call order. Calls the batch couldn't answer (quota errors,
+        per-call failures) are retried individually through _call_youtube_api.
+        """
+        results: List[Optional[Dict]] = [self._cache_get(endpoint, params) for endpoint, params in calls]
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        if len(pending) > 1:
+            def on_response(request_id: str, response: Dict, exception: Optional[Exception]) -> None:
+                if exception is None:
+                    results[int(request_id)] = response
+            
+            youtube = self.youtube
+            batch = youtube.new_batch_http_request(callback=on_response)
+            for i in pending:
+                endpoint, params = calls[i]
+                batch.add(getattr(youtube, endpoint)().list(**params), request_id=str(i))
+            try:
+                batch.execute(http=self._thread_http())
+            except HttpError as e:
+                logger.warning(f"Batched YouTube request failed, falling back to individual calls: {e}")
+            
+            for i in pending:
+                if results[i] is not None:
+                    self._cache_set(calls[i][0], calls[i][1], results[i])
+        
+        for i in pending:
+            if results[i] is None:
+                endpoint, params = calls[i]
+                results[i] = self._call_youtube_api(endpoint, **params)
+        
+        return results
+    
+    def _cache_key(self, endpoint: str, params: Dict) -> str:
+        """Build the response cache key for a list call."""
+        return "yt:" + hashlib.md5(
+            f"{endpoint}:{json.dumps(params, sort_keys=True)}".encode()
+        ).hexdigest()
+    
+    def _cache_get(self, endpoint: str, params: Dict) -> Optional[Any]:
+        """Return the cached response for a call, if any."""
+        if self.cache is None or not self.read_cache:
+            return None
+        try:
+            cached = self.cache.get(self._cache_key(endpoint, params))
+            if cached is not None:
+                return _json_loads(cached)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed for {endpoint}: {e}")
         return None
     
+    def _cache_set(self, endpoint: str, params: Dict, response: Any) -> None:
+        """Store a call response in the cache."""
+        if self.cache is None:
+            return
+        try:
+            self.cache.setex(self._cache_key(endpoint, params), self.cache_ttl, _json_dumps(response))
+        except Exception as e:
+            logger.warning(f"Cache store failed for {endpoint}: {e}")
+    
+    @staticmethod
+    def _is_quota_exceeded(error: HttpError) -> bool:
+        """Check whether an API error means the current key's daily quota is used up."""
+        return error.resp.status == 403 and b'quotaExceeded' in (error.content or b'')
+    
+    def _rotate_api_key(self, exhausted_client: Any) -> None:
+        """Switch to the next API key unless another thread already rotated away from it."""
+        with self._key_lock:
+            if self.youtube is not exhausted_client:
+                return
+            self._key_idx = (self._key_idx + 1) % len(self.api_keys)
+            self.api_key = self.api_keys[self._key_idx]
+            self.youtube = build('youtube', 'v3', developerKey=self.api_key)
+            logger.warning(f"YouTube API quota exceeded, rotating to key #{self._key_idx + 1}")
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def extract_playlist_id(url: str) -> Optional[str]:
+        """Extract playlist ID from YouTube URL."""
+        # Look up the actual 'list' parameter; a substring test would also match e.g. 'listing='
+        values = parse_qs(urlparse(url).query).get('list')
+        return values[0] if values else None
+    
     def get_playlist_info(self, playlist_id: str) -> Dict:
         """Get playlist metadata."""
         try:
-            response = self.youtube.playlists().list(
-                part='snippet,contentDetails',
-                id=playlist_id
-            ).execute()
-            
-            if not response['items']:
-                raise ValueError(f"Playlist {playlist_id} not found")
-            
-            item = response['items'][0]
-            snippet = item['snippet']
-            
-            return {
-                'playlist_id': playlist_id,
-                'title': snippet.get('title', ''),
-                'description': snippet.get('description', ''),
-                'channel_title': snippet.get('channelTitle', ''),
-                'thumbnail_url': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-                'published_at': snippet.get('publishedAt', ''),
-                'video_count': item['contentDetails'].get('itemCount', 0)
-            }
+            response = self._call_youtube_api('playlists', **self._playlist_info_params(playlist_id))
+            return self._parse_playlist_info(playlist_id, response)
         except HttpError as e:
             logger.error(f"YouTube API error: {e}")
             raise
     
+    def _playlist_info_params(self, playlist_id: str) -> Dict:
+        """Parameters for the playlists.list call behind get_playlist_info."""
+        return {'part': 'snippet,contentDetails', 'id': playlist_id}
+    
+    def _parse_playlist_info(self, playlist_id: str, response: Dict) -> Dict:
+        """Turn a playlists.list response into the playlist metadata dict."""
+        if not response['items']:
+            raise ValueError(f"Playlist {playlist_id} not found")
+        
+        item = response['items'][0]
+        snippet = item['snippet']
+        
+        return {
+            'playlist_id': playlist_id,
+            'title': snippet.get('title', ''),
+            'description': snippet.get('description', ''),
+            'channel_title': snippet.get('channelTitle', ''),
+            'thumbnail_url': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+            'published_at': snippet.get('publishedAt', ''),
+            'video_count': item['contentDetails'].get('itemCount', 0)
+        }
+    
     def get_playlist_videos(self, playlist_id: str, max_results: int = 50) -> List[Dict]:
-        """Get all videos from a playlist."""
+        """Get all videos from a playlist.
+        
+        Blocking wrapper around get_playlist_videos_async, so transcripts are still fetched
+        concurrently; must not be called from a running event loop.
+        """
+        return asyncio.run(self.get_playlist_videos_async(playlist_id, max_results))
+    
+    async def get_playlist_videos_async(self, playlist_id: str, max_results: int = 50,
+                                        max_concurrency: int = 16,
+                                        first_page: Optional[Dict] = None) -> List[Dict]:
+        """Get all videos from a playlist, fetching details and transcripts concurrently.
+        
+        `first_page` is an already fetched first playlistItems response, if any.
+        """
         videos = []
-        next_page_token = None
+        async for page in self.iter_playlist_videos_async(playlist_id, max_results, max_concurrency, first_page):
+            videos.extend(page)
+        return videos
+    
+    async def iter_playlist_videos_async(self, playlist_id: str, max_results: int = 50,
+                                         max_concurrency: int = 16,
+                                         first_page: Optional[Dict] = None) -> AsyncIterator[List[Dict]]:
+        """Yield a playlist's videos page by page, in playlist order, as each page is enriched.
         
-        try:
-            while len(videos) < max_results:
-                response = self.youtube.playlistItems().list(
-                    part='snippet,contentDetails',
-                    playlistId=playlist_id,
-                    maxResults=min(50, max_results - len(videos)),
-                    pageToken=next_page_token
-                ).execute()
-                
-                for item in response['items']:
-                    snippet = item['snippet']
-                    video_id = snippet['resourceId']['videoId']
-                    
-                    # Get additional video details
-                    video_details = self._get_video_details(video_id)
+        Pages are pipelined: while the next playlistItems page is being fetched, the
+        previous page's details and transcripts are already in flight.
+        `first_page` is an already fetched first playlistItems response, if any.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_details(video_ids: List[str]) -> Dict[str, Dict]:
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            return await self._run_blocking(self._get_videos_details, video_ids)
+        
+        async def fetch_transcript(video_id: str) -> str:
+            async with semaphore:
+                return await self._run_blocking(self._get_video_transcript, video_id)
+        
+        async def enrich_page(snippets: List[Dict]) -> List[Dict]:
+            video_ids = [snippet['resourceId']['videoId'] for snippet in snippets]
+            details, *transcripts = await asyncio.gather(
+                fetch_details(video_ids),
+                *(fetch_transcript(video_id) for video_id in video_ids)
+            )
+            return [
+                self._build_video_info(snippet, details.get(video_id, {}), transcript)
+                for snippet, video_id, transcript in zip(snippets, video_ids, transcripts)
+            ]
+        
+        # Enrichment tasks in page order; None marks the end of the playlist
+        page_tasks = asyncio.Queue()
+        
+        async def fetch_pages() -> None:
+            # Page tokens are chained, so pages are fetched in order, but each page is
+            # enriched in the background as soon as it arrives
+            try:
+                fetched = 0
+                next_page_token = None
+                response = first_page
+                while fetched < max_results:
+                    if response is None:
+                        params = self._playlist_items_params(playlist_id, max_results - fetched, next_page_token)
+                        response = await self._run_blocking(self._call_youtube_api, 'playlistItems', **params)
                     
-                    video_info = {
-                        'video_id': video_id,
-                        'title': snippet.get('title', ''),
-                        'description': snippet.get('description', ''),
-                        'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-                        'published_at': snippet.get('publishedAt', ''),
-                        'position': snippet.get('position', 0),
-                        'duration': video_details.get('duration', ''),
-                        'view_count': video_details.get('view_count', 0),
-                        'like_count': video_details.get('like_count', 0),
-                        'url': f"https://www.youtube.com/watch?v={video_id}",
-                        'transcript': self._get_video_transcript(video_id)                    }
+                    snippets = [item['snippet'] for item in response['items']]
+                    fetched += len(snippets)
+                    page_tasks.put_nowait(asyncio.ensure_future(enrich_page(snippets)))
                     
-                    videos.append(video_info)
-                
-                next_page_token = response.get('nextPageToken')
-                if not next_page_token:
+                    next_page_token = response.get('nextPageToken')
+                    response = None
+                    if not next_page_token:
+                        break
+            finally:
+                page_tasks.put_nowait(None)
+        
+        producer = asyncio.ensure_future(fetch_pages())
+        started = []
+        try:
+            while True:
+                task = await page_tasks.get()
+                if task is None:
                     break
+                started.append(task)
+                yield await task
             
-            return videos
+            # Surface any error that ended the page fetching early
+            await producer
         except HttpError as e:
             logger.error(f"YouTube API error getting videos: {e}")
             raise
+        finally:
+            producer.cancel()
+            while not page_tasks.empty():
+                started.append(page_tasks.get_nowait())
+            for task in started:
+                if task is not None:
+                    task.cancel()
     
-    def _get_video_details(self, video_id: str) -> Dict:
-        """Get additional video details."""
-        try:
-            response = self.youtube.videos().list(
-                part='contentDetails,statistics',
-                id=video_id
-            ).execute()
-            
-            if response['items']:
-                item = response['items'][0]
-                return {
-                    'duration': item['contentDetails'].get('duration', ''),
-                    'view_count': int(item['statistics'].get('viewCount', 0)),
-                    'like_count': int(item['statistics'].get('likeCount', 0))
-                }
-        except Exception as e:
-            logger.warning(f"Could not get video details for {video_id}: {e}")
+    def _playlist_items_params(self, playlist_id: str, remaining: int, page_token: Optional[str] = None) -> Dict:
+        """Parameters for one playlistItems.list page."""
+        return {
+            'part': 'snippet,contentDetails',
+            'playlistId': playlist_id,
+            'maxResults': min(50, remaining),
+            'pageToken': page_token
+        }
+    
+    def _build_video_info(self, snippet: Dict, video_details: Dict, transcript: str) -> Dict:
+        """Combine a playlist item snippet with its video details and transcript."""
+        video_id = snippet['resourceId']['videoId']
+        return {
+            'video_id': video_id,
+            'title': snippet.get('title', ''),
+            'description': snippet.get('description', ''),
+            'thumbnail': snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+            'published_at': snippet.get('publishedAt', ''),
+            'position': snippet.get('position', 0),
+            'duration': video_details.get('duration', ''),
+            'view_count': video_details.get('view_count', 0),
+            'like_count': video_details.get('like_count', 0),
+            'url': f"https://www.youtube.com/watch?v={video_id}",
+            'transcript': transcript
+        }
+    
+    def _get_videos_details(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Get additional video details keyed by video ID.
         
-        return {}
+        videos.list accepts up to 50 IDs per call at the same quota cost as one,
+        so IDs are requested in batches of 50.
+        """
+        details = {}
+        for start in range(0, len(video_ids), 50):
+            batch = video_ids[start:start + 50]
+            try:
+                response = self._call_youtube_api(
+                    'videos',
+                    part='contentDetails,statistics',
+                    id=','.join(batch)
+                )
+                
+                for item in response['items']:
+                    details[item['id']] = {
+                        'duration': item['contentDetails'].get('duration', ''),
+                        'view_count': int(item['statistics'].get('viewCount', 0)),
+                        'like_count': int(item['statistics'].get('likeCount', 0))
+                    }
+            except Exception as e:
+                logger.warning(f"Could not get video details for {', '.join(batch)}: {e}")
+        
+        return details
     
     def _get_video_transcript(self, video_id: str) -> str:
-        """Get video transcript if available."""
+        """Get video transcript if available, preferring a cached copy."""
         if not TRANSCRIPT_AVAILABLE:
             return ""
         
+        cache_params = {'video_id': video_id}
+        cached = self._cache_get('transcript', cache_params)
+        if cached is not None:
+            return cached
+        
+        transcript = self._fetch_video_transcript(video_id)
+        if transcript:
+            self._cache_set('transcript', cache_params, transcript)
+        return transcript
+    
+    def _fetch_video_transcript(self, video_id: str) -> str:
+        """Download and trim a video's transcript, or return "" if unavailable."""
         try:
             # Try to get transcript in English first, then any available language
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            if TranscriptListFetcher is not None:
+                # Reuse this thread's connections (and YouTube consent cookie) across videos
+                transcript_list = TranscriptListFetcher(self._thread_session()).fetch(video_id)
+            else:
+                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
             
             try:
                 # Try English first
@@ -162,53 +537,110 @@ class YouTubeExtractor:
             # Get the actual transcript data
             transcript_data = transcript.fetch()
             
-            # Combine all text segments
-            full_transcript = " ".join([entry['text'] for entry in transcript_data])
-            
-            # Limit transcript length to avoid overwhelming the AI
-            if len(full_transcript) > 2000:
-                full_transcript = full_transcript[:2000] + "..."
+            # Combine text segments, stopping once the length limit is passed so long
+            # transcripts are never joined in full (limit keeps the AI prompt manageable)
+            parts = []
+            length = -1  # no separator before the first segment
+            for entry in transcript_data:
+                parts.append(entry['text'])
+                length += len(entry['text']) + 1
+                if length > 2000:
+                    return " ".join(parts)[:2000] + "..."
             
-            return full_transcript
+            return " ".join(parts)
             
         except Exception as e:
             logger.debug(f"Could not get transcript for video {video_id}: {e}")
             return ""
     
     def extract_playlist_data(self, playlist_url: str, max_videos: int = 50) -> Dict:
-        """Extract complete playlist data."""
+        """Extract complete playlist data.
+        
+        Blocking wrapper around extract_playlist_data_async; must not be called from a
+        running event loop.
+        """
+        return asyncio.run(self.extract_playlist_data_async(playlist_url, max_videos))
+    
+    async def extract_playlist_data_async(self, playlist_url: str, max_videos: int = 50) -> Dict:
+        """Extract complete playlist data, fetching per-video data concurrently."""
+        playlist_data = None
+        async for playlist_data in self.iter_playlist_data_async(playlist_url, max_videos):
+            pass
+        return playlist_data
+    
+    async def iter_playlist_data_async(self, playlist_url: str, max_videos: int = 50) -> AsyncIterator[Dict]:
+        """Extract playlist data page by page, yielding the partial playlist data after each page.
+        
+        The same dict is yielded every time, with its `videos` list extended in playlist
+        order, so consumers can start on the first videos while later pages are fetched.
+        """
         playlist_id = self.extract_playlist_id(playlist_url)
         if not playlist_id:
             raise ValueError("Invalid YouTube playlist URL")
         
         logger.info(f"Extracting playlist data for: {playlist_id}")
         
-        playlist_info = self.get_playlist_info(playlist_id)
-        videos = self.get_playlist_videos(playlist_id, max_videos)
+        # Playlist metadata and the first page of items share one batched round trip
+        try:
+            info_response, first_page = await self._run_blocking(self._batch_youtube_api, [
+                ('playlists', self._playlist_info_params(playlist_id)),
+                ('playlistItems', self._playlist_items_params(playlist_id, max_videos))
+            ])
+        except HttpError as e:
+            logger.error(f"YouTube API error: {e}")
+            raise
         
-        return {
-            'playlist_info': playlist_info,
-            'videos': videos,
+        playlist_data = {
+            'playlist_info': self._parse_playlist_info(playlist_id, info_response),
+            'videos': [],
             'extracted_at': datetime.now().isoformat()
         }
-
+        pages = 0
+        async for page in self.iter_playlist_videos_async(playlist_id, max_videos, first_page=first_page):
+            pages += 1
+            playlist_data['videos'].extend(page)
+            playlist_data['extracted_at'] = datetime.now().isoformat()
+            yield playlist_data
+        
+        if not pages:
+            yield playlist_data
 
 class CourseGenerator:
     """Generates comprehensive course structures using Google Gemini."""
     
-    def __init__(self, api_key: str, model: str = "gemini-1.5-flash"):
-        """Initialize Gemini client."""
+    # Number of leading videos summarized in the course info prompt
+    SUMMARY_VIDEOS = 10
+    
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash", cache: Optional[Any] = None,
+                 cache_ttl: int = 7 * 24 * 3600):
+        """Initialize Gemini client.
+        
+        `cache` is any Redis-compatible client (get/setex) used to reuse parsed responses
+        for identical prompts.
+        """
         genai.configure(api_key=api_key)
         self.model_name = model
         self.model = genai.GenerativeModel(model)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
         
-        # Configure generation settings
-        self.generation_config = genai.types.GenerationConfig(
-            temperature=0.7,
-            top_p=0.9,
-            top_k=40,
-            max_output_tokens=4096,
-        )
+        # Configure generation settings; output budgets are sized per call so small
+        # objects don't reserve (or run on to) the full module-sized budget
+        self.generation_config = self._make_generation_config(4096)
+        self.course_info_config = self._make_generation_config(1024)
+        self.module_config = self.generation_config
+        self.assignment_config = self._make_generation_config(512)
+        self.final_exam_config = self._make_generation_config(2048)
+    
+    @staticmethod
+    def _make_generation_config(max_output_tokens: int) -> Any:
+        """Build a generation config, asking for a bare JSON response where supported."""
+        settings = dict(temperature=0.7, top_p=0.9, top_k=40, max_output_tokens=max_output_tokens)
+        try:
+            # JSON mode (google-generativeai >= 0.5) returns bare JSON, so parsing never needs the regex fallbacks
+            return genai.types.GenerationConfig(response_mime_type="application/json", **settings)
+        except TypeError:
+            return genai.types.GenerationConfig(**settings)
     
     def generate_comprehensive_course(self, playlist_data: Dict) -> Dict:
         """Generate complete course structure from playlist data."""
@@ -221,7 +653,7 @@ class CourseGenerator:
         course_info = self._generate_course_info(playlist_data, content_summary)
         
         # Generate modules with lessons
-        modules = self._generate_modules(playlist_data, content_summary, course_info)
+        modules = self._generate_modules(playlist_data, course_info)
         
         # Generate assignments
         assignments = self._generate_assignments(modules, course_info)
@@ -229,7 +661,50 @@ class CourseGenerator:
         # Generate final exam
         final_exam = self._generate_final_exam(course_info, modules)
         
-        # Create complete course structure
+        return self._build_course_structure(course_info, modules, assignments, final_exam)
+    
+    async def generate_comprehensive_course_async(self, playlist_data: Dict, max_concurrency: int = 5,
+                                                  course_info_request: Optional[Awaitable] = None) -> Dict:
+        """Generate the course like generate_comprehensive_course, running Gemini calls concurrently.
+        
+        Modules are generated in parallel once the course info is known, then the
+        assignments and the final exam are generated in parallel.
+        
+        `max_concurrency` caps the number of in-flight Gemini calls to stay under the RPM limit.
+        `course_info_request` is an already started request_course_info_async call, if any.
+        """
+        logger.info("Generating comprehensive course structure...")
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        if course_info_request is None:
+            course_info_request = self.request_course_info_async(playlist_data)
+        course_info = await course_info_request or self._fallback_course_info(playlist_data)
+        
+        async def generate(func, *args):
+            async with semaphore:
+                return await loop.run_in_executor(None, func, *args)
+        
+        module_groups = self._group_videos_into_modules(playlist_data.get('videos', []))
+        modules = list(await asyncio.gather(*(
+            generate(self._generate_single_module, number, group, course_info)
+            for number, group in enumerate(module_groups, 1)
+        )))
+        
+        # Assignments and the final exam only depend on the modules, so they run together
+        assignments, final_exam = await asyncio.gather(
+            asyncio.gather(*(
+                generate(self._generate_assignment, i, module, course_info)
+                for i, module in enumerate(modules[:3])
+            )),
+            generate(self._generate_final_exam, course_info, modules)
+        )
+        
+        return self._build_course_structure(course_info, modules, list(assignments), final_exam)
+    
+    def _build_course_structure(self, course_info: Dict, modules: List[Dict], assignments: List[Dict],
+                                final_exam: Dict) -> Dict:
+        """Assemble the generated parts into the final course structure."""
         course_structure = {
             "course": course_info,
             "modules": modules,
@@ -256,19 +731,37 @@ class CourseGenerator:
         summary_parts.append("")
         
         # Add video summaries
-        for i, video in enumerate(playlist_data.get('videos', [])[:10]):
-            summary_parts.append(f"Video {i+1}: {video.get('title', 'Unknown')}")
-            summary_parts.append(f"Description: {video.get('description', '')[:200]}")
-            if video.get('transcript'):
-                transcript_preview = video['transcript'][:300] + "..." if len(video['transcript']) > 300 else video['transcript']
-                summary_parts.append(f"Transcript preview: {transcript_preview}")
+        for i, video in enumerate(playlist_data.get('videos', ())[:self.SUMMARY_VIDEOS], 1):
+            summary_parts.append(
+                f"Video {i}: {video.get('title', 'Unknown')}\n"
+                f"Description: {(video.get('description') or '')[:200]}"
+            )
+            transcript = video.get('transcript')
+            if transcript:
+                ellipsis = "..." if len(transcript) > 300 else ""
+                summary_parts.append(f"Transcript preview: {transcript[:300]}{ellipsis}")
             summary_parts.append("")
         
         return "\n".join(summary_parts)
     
     def _generate_course_info(self, playlist_data: Dict, content_summary: str) -> Dict:
         """Generate comprehensive course information."""
-        playlist_info = playlist_data.get('playlist_info', {})
+        return (self._request_course_info(playlist_data.get('playlist_info', {}), content_summary)
+                or self._fallback_course_info(playlist_data))
+    
+    async def request_course_info_async(self, playlist_data: Dict) -> Optional[Dict]:
+        """Ask Gemini for the course info, or None if it gives no usable response.
+        
+        Only the first SUMMARY_VIDEOS videos are used, so this can start before the
+        rest of the playlist has been extracted.
+        """
+        content_summary = self._prepare_content_summary(playlist_data)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._request_course_info, playlist_data.get('playlist_info', {}), content_summary
+        )
+    
+    def _request_course_info(self, playlist_info: Dict, content_summary: str) -> Optional[Dict]:
+        """Generate comprehensive course information with Gemini."""
         
         prompt = f"""
         Based on this YouTube playlist content, generate comprehensive course information:
@@ -294,13 +787,7 @@ class CourseGenerator:
         """
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            parsed_json = self._parse_json_from_response(content)
+            parsed_json = self._generate_json(prompt, self.course_info_config)
             if parsed_json:
                 course_info = parsed_json
                 
@@ -313,7 +800,11 @@ class CourseGenerator:
         except Exception as e:
             logger.error(f"Error generating course info: {e}")
         
-        # Fallback course info
+        return None
+    
+    def _fallback_course_info(self, playlist_data: Dict) -> Dict:
+        """Course info used when Gemini doesn't return a usable response."""
+        playlist_info = playlist_data.get('playlist_info', {})
         return {
             "title": playlist_info.get('title', 'Learning Course'),
             "description": "A comprehensive course based on curated YouTube content",
@@ -334,53 +825,41 @@ class CourseGenerator:
             "estimatedHours": len(playlist_data.get('videos', [])) * 0.5
         }
     
-    def _generate_modules(self, playlist_data: Dict, content_summary: str, course_info: Dict) -> List[Dict]:
+    def _generate_modules(self, playlist_data: Dict, course_info: Dict) -> List[Dict]:
         """Generate course modules with lessons."""
-        videos = playlist_data.get('videos', [])
+        module_slices = self._group_videos_into_modules(playlist_data.get('videos', []))
+        return [
+            self._generate_single_module(module_number, module_videos, course_info)
+            for module_number, module_videos in enumerate(module_slices, 1)
+        ]
+    
+    def _group_videos_into_modules(self, videos: List[Dict]) -> List[List[Dict]]:
+        """Split the playlist videos into consecutive per-module groups."""
         total_videos = len(videos)
         
         # Determine number of modules (aim for 3-6 modules)
         num_modules = max(3, min(6, total_videos // 3))
         videos_per_module = total_videos // num_modules
         
-        modules = []
-        
-        for module_idx in range(num_modules):
-            start_idx = module_idx * videos_per_module
-            end_idx = start_idx + videos_per_module if module_idx < num_modules - 1 else total_videos
-            module_videos = videos[start_idx:end_idx]
-            
-            module = self._generate_single_module(
-                module_idx + 1, 
-                module_videos, 
-                course_info,
-                content_summary
-            )
-            modules.append(module)
-        
-        return modules
+        # Every module gets videos_per_module videos; the last one also takes the remainder
+        boundaries = [
+            (i * videos_per_module, (i + 1) * videos_per_module if i < num_modules - 1 else total_videos)
+            for i in range(num_modules)
+        ]
+        return [videos[start:end] for start, end in boundaries]
     
-    def _generate_single_module(self, module_number: int, videos: List[Dict], course_info: Dict, content_summary: str) -> Dict:
+    def _generate_single_module(self, module_number: int, videos: List[Dict], course_info: Dict) -> Dict:
         """Generate a single module with lessons."""
-        # Prepare video summaries for this module
-        video_summaries = []
-        for video in videos:
-            video_summaries.append({
-                'title': video.get('title', ''),
-                'description': video.get('description', '')[:200],
-                'url': video.get('url', ''),
-                'video_id': video.get('video_id', ''),
-                'duration': video.get('duration', ''),
-                'transcript_preview': video.get('transcript', '')[:300] if video.get('transcript') else None
-            })
+        # One terse line per video keeps the prompt (and input token count) small
+        video_briefs = "\n        ".join(self._video_brief(video) for video in videos)
         
         prompt = f"""
         Generate a comprehensive learning module for this course:
         Course: {course_info['title']}
         Module Number: {module_number}
         
-        Videos in this module:
-        {json.dumps(video_summaries, indent=2)}
+        Videos in this module (video ID | title | duration | transcript or description excerpt):
+        {video_briefs}
         
         Create a JSON object with this structure:
         {{
@@ -431,21 +910,14 @@ class CourseGenerator:
         """
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                module_data = json.loads(json_match.group())
-                
+            module_data = self._generate_json(prompt, self.module_config)
+            if module_data:
                 # Ensure video lessons use actual video data
-                video_copy = videos.copy()
+                video_index = 0
                 for lesson in module_data.get('lessons', []):
-                    if lesson.get('type') == 'video' and video_copy:
-                        video = video_copy.pop(0)
+                    if lesson.get('type') == 'video' and video_index < len(videos):
+                        video = videos[video_index]
+                        video_index += 1
                         lesson['content'] = {
                             'videoUrl': video.get('url', ''),
                             'videoId': video.get('video_id', ''),
@@ -506,63 +978,71 @@ class CourseGenerator:
             "lessons": lessons
         }
     
+    def _video_brief(self, video: Dict) -> str:
+        """Summarize a video as a single prompt line.
+        
+        The transcript excerpt is preferred; the description is only used when there is none.
+        """
+        transcript = video.get('transcript')
+        excerpt = transcript[:300] if transcript else video.get('description', '')[:200]
+        return " | ".join((
+            video.get('video_id', ''),
+            video.get('title', '')[:80],
+            video.get('duration', ''),
+            " ".join(excerpt.split())
+        ))
+    
     def _generate_assignments(self, modules: List[Dict], course_info: Dict) -> List[Dict]:
         """Generate course assignments."""
-        assignments = []
+        return [
+            self._generate_assignment(i, module, course_info)
+            for i, module in enumerate(modules[:3])
+        ]
+    
+    def _generate_assignment(self, i: int, module: Dict, course_info: Dict) -> Dict:
+        """Generate the assignment for the i-th (0-based) module."""
+        assignment_id = f"assignment-{i+1}"
         
-        for i, module in enumerate(modules[:3]):
-            assignment_id = f"assignment-{i+1}"
-            
-            prompt = f"""
-            Generate an assignment for this course module:
-            Course: {course_info['title']}
-            Module: {module['title']} - {module['description']}
-            
-            Create a JSON object:
-            {{
-                "id": "{assignment_id}",
-                "title": "Assignment title",
-                "description": "Detailed assignment description (2-3 sentences)",
-                "moduleId": "{module['id']}",
-                "dueDate": "Due date (ISO format, 2 weeks from now)",
-                "points": "Point value (50-150)",
-                "submissionType": "file"
-            }}
-            
-            Make it practical and relevant to the module content.
-            Return ONLY the JSON object.
-            """
-            
-            try:
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=self.generation_config
-                )
+        prompt = f"""
+        Generate an assignment for this course module:
+        Course: {course_info['title']}
+        Module: {module['title']} - {module['description']}
+        
+        Create a JSON object:
+        {{
+            "id": "{assignment_id}",
+            "title": "Assignment title",
+            "description": "Detailed assignment description (2-3 sentences)",
+            "moduleId": "{module['id']}",
+            "dueDate": "Due date (ISO format, 2 weeks from now)",
+            "points": "Point value (50-150)",
+            "submissionType": "file"
+        }}
+        
+        Make it practical and relevant to the module content.
+        Return ONLY the JSON object.
+        """
+        
+        try:
+            assignment = self._generate_json(prompt, self.assignment_config)
+            if assignment:
+                due_date = (datetime.now() + timedelta(weeks=2*(i+1))).isoformat()
+                assignment['dueDate'] = due_date
+                return assignment
                 
-                content = response.text.strip()
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    assignment = json.loads(json_match.group())
-                    due_date = (datetime.now() + timedelta(weeks=2*(i+1))).isoformat()
-                    assignment['dueDate'] = due_date
-                    assignments.append(assignment)
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"Error generating assignment {i+1}: {e}")
-            
-            # Fallback assignment
-            assignments.append({
-                "id": assignment_id,
-                "title": f"Module {i+1} Assignment",
-                "description": f"Complete practical exercises based on {module['title']} content.",
-                "moduleId": module['id'],
-                "dueDate": (datetime.now() + timedelta(weeks=2*(i+1))).isoformat(),
-                "points": 100,
-                "submissionType": "file"
-            })
+        except Exception as e:
+            logger.error(f"Error generating assignment {i+1}: {e}")
         
-        return assignments
+        # Fallback assignment
+        return {
+            "id": assignment_id,
+            "title": f"Module {i+1} Assignment",
+            "description": f"Complete practical exercises based on {module['title']} content.",
+            "moduleId": module['id'],
+            "dueDate": (datetime.now() + timedelta(weeks=2*(i+1))).isoformat(),
+            "points": 100,
+            "submissionType": "file"
+        }
     
     def _generate_final_exam(self, course_info: Dict, modules: List[Dict]) -> Dict:
         """Generate final exam."""
@@ -572,7 +1052,7 @@ class CourseGenerator:
         Description: {course_info['description']}
         
         Modules covered:
-        {json.dumps([{"title": m["title"], "description": m["description"]} for m in modules], indent=2)}
+        {_json_dumps([{"title": m["title"], "description": m["description"]} for m in modules], indent=True)}
         
         Create a JSON object:
         {{
@@ -603,15 +1083,9 @@ class CourseGenerator:
         """
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            final_exam = self._generate_json(prompt, self.final_exam_config)
+            if final_exam:
+                return final_exam
                 
         except Exception as e:
             logger.error(f"Error generating final exam: {e}")
@@ -655,6 +1129,70 @@ class CourseGenerator:
             "Add video transcripts and accessibility features"
         ]
     
+    def _generate_json(self, prompt: str, generation_config: Optional[Any] = None) -> Optional[Dict]:
+        """Run a Gemini completion and parse the JSON object out of it.
+        
+        Successfully parsed responses are cached by a hash of the model, generation config
+        and prompt, so re-running the same playlist skips the model call; unparseable
+        responses are never cached.
+        """
+        generation_config = generation_config or self.generation_config
+        cache_key = None
+        if self.cache is not None:
+            fingerprint = f"{self.model_name}:{self._config_fingerprint(generation_config)}:{prompt}"
+            cache_key = "gemini:" + hashlib.sha256(fingerprint.encode()).hexdigest()
+            try:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return _json_loads(cached)
+            except Exception as e:
+                logger.warning(f"Cache lookup failed for Gemini response: {e}")
+        
+        # Stream the response and stop reading as soon as a complete JSON object is in
+        # the buffer; anything the model appends after the object is never waited for
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+        chunks = []
+        parsed = None
+        for chunk in response:
+            chunks.append(chunk.text)
+            if '}' in chunk.text:
+                parsed = self._parse_outer_object("".join(chunks))
+                if parsed is not None:
+                    break
+        
+        if parsed is None:
+            parsed = self._parse_json_from_response("".join(chunks))
+        
+        if parsed and cache_key is not None:
+            try:
+                self.cache.setex(cache_key, self.cache_ttl, _json_dumps(parsed))
+            except Exception as e:
+                logger.warning(f"Cache store failed for Gemini response: {e}")
+        
+        return parsed
+    
+    @staticmethod
+    def _config_fingerprint(generation_config: Any) -> str:
+        """Stable text form of a generation config's settings, for cache keys."""
+        settings = generation_config if isinstance(generation_config, dict) else vars(generation_config)
+        return repr(sorted(settings.items()))
+    
+    def _parse_outer_object(self, content: str) -> Optional[Dict]:
+        """Parse the text between the first '{' and the last '}' as a JSON object, quietly."""
+        start, end = content.find('{'), content.rfind('}')
+        if start != -1 and end > start:
+            try:
+                parsed = _json_loads(content[start:end + 1])
+                if isinstance(parsed, dict):
+                    return parsed
+            except json.JSONDecodeError:
+                pass
+        return None
+    
     def _parse_json_from_response(self, content: str) -> Optional[Dict]:
         """Safely parse JSON from AI response with multiple fallback strategies."""
         if not content:
@@ -662,38 +1200,41 @@ class CourseGenerator:
         
         content = content.strip()
         
-        # Strategy 1: Try direct JSON parse if content looks like JSON
-        if content.startswith('{') and content.endswith('}'):
+        # Strategy 1: Parse the span from the first '{' to the last '}' (no regex needed);
+        # this covers bare JSON as well as JSON wrapped in prose or code fences
+        parsed = self._parse_outer_object(content)
+        if parsed is not None:
+            return parsed
+        
+        # Strategy 2: Scan for the first balanced object, which ignores any trailing
+        # text that happens to contain a '}'
+        span = _find_json_span(content)
+        if span is not None:
             try:
-                return json.loads(content)
+                parsed = _json_loads(span)
+                if isinstance(parsed, dict):
+                    return parsed
             except json.JSONDecodeError:
                 pass
         
-        # Strategy 2: Find JSON block using regex
-        patterns = [
-            r'```json\s*(\{.*?\})\s*```',  # JSON code block
-            r'```\s*(\{.*?\})\s*```',      # Generic code block
-            r'(\{.*?\})',                   # Any JSON object
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.DOTALL)
-            for match in matches:
+        # Strategy 3: Find JSON block using regex
+        for pattern in (_JSON_CODE_BLOCK, _JSON_GENERIC_BLOCK, _JSON_OBJECT):
+            for match in pattern.findall(content):
                 try:
-                    parsed = json.loads(match.strip())
+                    # The JSON decoder ignores surrounding whitespace, so matches are parsed as-is
+                    parsed = _json_loads(match)
                     if isinstance(parsed, dict):
                         return parsed
                 except json.JSONDecodeError:
                     continue
         
-        # Strategy 3: Try to fix common JSON issues
+        # Strategy 4: Try to fix common JSON issues
         try:
             # Remove common markdown formatting
-            cleaned = re.sub(r'```json|```', '', content)
-            cleaned = cleaned.strip()
+            cleaned = _JSON_FENCE.sub('', content)
             
             # Try parsing again
-            return json.loads(cleaned)
+            return _json_loads(cleaned)
         except json.JSONDecodeError:
             pass
         
@@ -704,23 +1245,34 @@ class CourseGenerator:
 class YouTubeAgent:
     """Main agent class that orchestrates the course generation process."""
     
-    def __init__(self, youtube_api_key: str, gemini_api_key: str, output_dir: str = "output"):
-        """Initialize the YouTube agent."""
-        self.extractor = YouTubeExtractor(youtube_api_key)
-        self.generator = CourseGenerator(gemini_api_key)
+    def __init__(self, youtube_api_key: Union[str, List[str]], gemini_api_key: str,
+                 output_dir: Optional[str] = "output", cache: Optional[Any] = None):
+        """Initialize the YouTube agent.
+        
+        `youtube_api_key` may be a list of keys to rotate through on quota errors.
+        With `output_dir=None` courses are kept in memory only and never written to disk.
+        Pass a Redis-compatible `cache` to reuse YouTube API and Gemini responses across runs.
+        """
+        self.extractor = YouTubeExtractor(youtube_api_key, cache=cache)
+        self.generator = CourseGenerator(gemini_api_key, cache=cache)
         self.output_dir = output_dir
         
         # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
     
-    def process_playlist(self, playlist_url: str, max_videos: int = 20) -> str:
-        """Process a YouTube playlist and generate a comprehensive course."""
+    def process_playlist(self, playlist_url: str, max_videos: int = 20, force_refresh: bool = False) -> str:
+        """Process a YouTube playlist and generate a comprehensive course.
+        
+        With `force_refresh=True` cached YouTube data is ignored and re-fetched.
+        """
         try:
             logger.info(f"Starting course generation for: {playlist_url}")
             
             # Step 1: Extract playlist data
             logger.info("Step 1: Extracting playlist data...")
-            playlist_data = self.extractor.extract_playlist_data(playlist_url, max_videos)
+            extractor = self.extractor.refreshing() if force_refresh else self.extractor
+            playlist_data = extractor.extract_playlist_data(playlist_url, max_videos)
             
             # Step 2: Generate comprehensive course
             logger.info("Step 2: Generating comprehensive course structure...")
@@ -728,10 +1280,11 @@ class YouTubeAgent:
             
             # Step 3: Save to output file
             logger.info("Step 3: Saving course structure...")
-            output_file = self._save_course(course_structure, playlist_data)
+            output_file, _ = self._save_course(course_structure, playlist_data)
             
             logger.info(f"Course generation completed successfully!")
-            logger.info(f"Output saved to: {output_file}")
+            if output_file:
+                logger.info(f"Output saved to: {output_file}")
             
             return output_file
             
@@ -739,15 +1292,55 @@ class YouTubeAgent:
             logger.error(f"Error processing playlist: {e}")
             raise
     
-    def _save_course(self, course_structure: Dict, playlist_data: Dict) -> str:
-        """Save course structure to JSON file."""
-        # Generate filename from course title
-        course_title = course_structure.get('course', {}).get('title', 'Course')
-        safe_title = re.sub(r'[^\w\s-]', '', course_title).strip().replace(' ', '_')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{safe_title}_{timestamp}.json"
-        filepath = os.path.join(self.output_dir, filename)
+    async def process_playlist_async(self, playlist_url: str, max_videos: int = 20,
+                                     force_refresh: bool = False) -> Tuple[Optional[str], Dict]:
+        """Process a playlist like process_playlist, fetching video data and generating modules concurrently.
         
+        Returns the output file path together with the saved course data, so callers
+        don't have to re-read the file.
+        """
+        course_info_request = None
+        try:
+            logger.info(f"Starting course generation for: {playlist_url}")
+            
+            # Step 1: Extract playlist data (video details and transcripts fan out). The
+            # course info prompt only needs the first videos, so its Gemini call starts
+            # as soon as they're in, overlapping the extraction of later pages
+            logger.info("Step 1: Extracting playlist data...")
+            extractor = self.extractor.refreshing() if force_refresh else self.extractor
+            async for playlist_data in extractor.iter_playlist_data_async(playlist_url, max_videos):
+                if course_info_request is None and len(playlist_data['videos']) >= self.generator.SUMMARY_VIDEOS:
+                    course_info_request = asyncio.ensure_future(
+                        self.generator.request_course_info_async(playlist_data)
+                    )
+            
+            # Step 2: Generate comprehensive course, with modules generated concurrently
+            logger.info("Step 2: Generating comprehensive course structure...")
+            course_structure = await self.generator.generate_comprehensive_course_async(
+                playlist_data, course_info_request=course_info_request
+            )
+            
+            # Step 3: Save to output file
+            logger.info("Step 3: Saving course structure...")
+            output_file, course_data = self._save_course(course_structure, playlist_data)
+            
+            logger.info(f"Course generation completed successfully!")
+            if output_file:
+                logger.info(f"Output saved to: {output_file}")
+            
+            return output_file, course_data
+            
+        except Exception as e:
+            if course_info_request is not None:
+                course_info_request.cancel()
+            logger.error(f"Error processing playlist: {e}")
+            raise
+    
+    def _save_course(self, course_structure: Dict, playlist_data: Dict) -> Tuple[Optional[str], Dict]:
+        """Save course structure to JSON file and return the path with the saved data.
+        
+        The path is None when the agent has no output directory.
+        """
         # Add metadata
         output_data = {
             **course_structure,
@@ -763,20 +1356,41 @@ class YouTubeAgent:
             }
         }
         
-        # Save to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        if self.output_dir is None:
+            return None, output_data
+        
+        # Generate filename from course title
+        course_title = course_structure.get('course', {}).get('title', 'Course')
+        safe_title = _SAFE_TITLE_RE.sub('', course_title).strip().replace(' ', '_')
+        timestamp = time.strftime(_TIMESTAMP_FORMAT)
+        filename = f"{safe_title}_{timestamp}.json"
+        filepath = os.path.join(self.output_dir, filename)
+        
+        # Save to file, serializing up front so the whole document goes out in one write
+        if orjson is not None:
+            payload = orjson.dumps(output_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(output_data, indent=2, ensure_ascii=False).encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(payload)
         
-        return filepath
+        return filepath, output_data
     
     def get_course_summary(self, course_structure: Dict) -> str:
         """Generate a summary of the created course."""
-        course = course_structure.get('course', {})
-        modules = course_structure.get('modules', [])
-        assignments = course_structure.get('assignments', [])
-        final_exam = course_structure.get('finalExam', {})
+        course = course_structure.get('course') or {}
+        modules = course_structure.get('modules') or []
+        lesson_counts = [len(m.get('lessons') or ()) for m in modules]
+        
+        objectives = "".join(
+            f"   {i}. {obj}\n" for i, obj in enumerate(course.get('learningObjectives') or (), 1)
+        )
+        module_lines = "".join(
+            f"   Module {i}: {module.get('title', 'N/A')} ({count} lessons)\n"
+            for i, (module, count) in enumerate(zip(modules, lesson_counts), 1)
+        )
         
-        summary = f"""
+        return f"""
 Course Generation Summary
 ========================
 
@@ -790,25 +1404,25 @@ Course Generation Summary
 
 📖 Structure:
 - Modules: {len(modules)}
-- Lessons: {sum(len(m.get('lessons', [])) for m in modules)}
-- Assignments: {len(assignments)}
-- Final Exam: {'Yes' if final_exam else 'No'}
+- Lessons: {sum(lesson_counts)}
+- Assignments: {len(course_structure.get('assignments') or ())}
+- Final Exam: {'Yes' if course_structure.get('finalExam') else 'No'}
 
 🎯 Learning Objectives:
-"""
-        for i, obj in enumerate(course.get('learningObjectives', []), 1):
-            summary += f"   {i}. {obj}\n"
-        
-        summary += "\n📖 Modules Overview:\n"
-        for i, module in enumerate(modules, 1):
-            lessons = module.get('lessons', [])
-            summary += f"   Module {i}: {module.get('title', 'N/A')} ({len(lessons)} lessons)\n"
-        
-        return summary
+{objectives}
+📖 Modules Overview:
+{module_lines}"""
 
 
 def main():
     """Main function to run the YouTube agent."""
+    # Use the faster libuv event loop for the concurrent fetch/generation when it's installed
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Load environment variables
     load_dotenv()
     
@@ -823,8 +1437,8 @@ def main():
         print("  - GOOGLE_AI_API_KEY")
         return
     
-    # Initialize agent
-    agent = YouTubeAgent(youtube_api_key, gemini_api_key, "output")
+    # Initialize agent; responses are cached on disk so re-runs skip repeated API calls
+    agent = YouTubeAgent(youtube_api_key, gemini_api_key, "output", cache=SQLiteCache())
     
     # Get playlist URL from user
     if len(sys.argv) > 1:
@@ -850,12 +1464,8 @@ def main():
         print(f"📊 Max videos: {max_videos}")
         print("-" * 60)
         
-        # Process playlist
-        output_file = agent.process_playlist(playlist_url, max_videos)
-        
-        # Load and display summary
-        with open(output_file, 'r', encoding='utf-8') as f:
-            course_data = json.load(f)
+        # Process playlist; the saved course comes back in memory, so the file isn't re-read
+        output_file, course_data = asyncio.run(agent.process_playlist_async(playlist_url, max_videos))
         
         print(agent.get_course_summary(course_data))
         print(f"💾 Course saved to: {output_file}")
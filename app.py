@@ -4,24 +4,37 @@ Web interface for the YouTube Playlist Learning Module Generator.
 """
 
 import os
+import re
+import atexit
+import copy
 import sys
 import json
 import logging
-from datetime import datetime
-from typing import Dict, Optional
-
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 
-# Add src directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Import orjson with fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from src.youtube_extractor import YouTubeExtractor
 from src.content_analyzer import ContentAnalyzer
 from src.enhanced_content_analyzer import EnhancedContentAnalyzer
 from src.module_generator import ModuleGenerator
 from src.firebase_service import FirebaseService
-from src.utils import validate_youtube_url
+from src.utils import validate_youtube_url, SQLiteCache
 
 # Load environment variables
 load_dotenv()
@@ -30,9 +43,137 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Matches the playlist ID in /playlist?list=... and /watch?v=...&list=... URLs
+_LIST_RE = re.compile(r'[?&]list=([^&#]+)')
+
+
+@functools.lru_cache(maxsize=1024)
+def _playlist_id(url: str) -> Optional[str]:
+    """Extract the playlist ID from a playlist URL, or None if it has no 'list' parameter."""
+    match = _LIST_RE.search(url)
+    return match.group(1) if match else None
+
+# (epoch second, formatted timestamp) of the last _now_iso() call
+_now_iso_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Current local time as an ISO 8601 string, formatted at most once per second."""
+    global _now_iso_cache
+    now = int(time.time())
+    if _now_iso_cache[0] != now:
+        _now_iso_cache = (now, time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)))
+    return _now_iso_cache[1]
+
+
+# Number of recently updated playlists whose analyses are loaded at startup
+PREWARM_PLAYLISTS = 50
+
+# Firebase writes run here so responses don't wait on them
+_IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='firebase-io')
+atexit.register(_IO_POOL.shutdown)
+
+
+# In-process analysis cache: playlist_id -> (expiry monotonic time, analysis). Other
+# workers' writes and deletes don't clear it, so entries expire after a short TTL
+ANALYSIS_CACHE_SIZE = 256
+ANALYSIS_CACHE_TTL = 300
+_analysis_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+
+def _cached_analysis(playlist_id: str) -> Optional[Dict]:
+    """Firebase analysis lookup, memoized in-process for ANALYSIS_CACHE_TTL seconds.
+    
+    Misses (None, which Firebase also returns on errors) aren't cached, and callers get
+    their own copy so they can't modify the cached analysis.
+    """
+    now = time.monotonic()
+    with _analysis_cache_lock:
+        entry = _analysis_cache.get(playlist_id)
+        if entry is not None and entry[0] > now:
+            _analysis_cache.move_to_end(playlist_id)
+            return copy.deepcopy(entry[1])
+    
+    analysis = firebase_service.get_analysis_results(playlist_id)
+    if analysis is None:
+        return None
+    
+    with _analysis_cache_lock:
+        _analysis_cache[playlist_id] = (now + ANALYSIS_CACHE_TTL, analysis)
+        _analysis_cache.move_to_end(playlist_id)
+        while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return copy.deepcopy(analysis)
+
+
+def _clear_analysis_cache() -> None:
+    """Drop every memoized analysis after this process writes or deletes one."""
+    with _analysis_cache_lock:
+        _analysis_cache.clear()
+
+
+def _store_results(playlist_data: Dict, playlist_id: Optional[str], analysis_data: Optional[Dict] = None) -> None:
+    """Store playlist data, plus its analysis when given, in Firebase with batched writes.
+    
+    Runs on _IO_POOL, so failures are logged rather than raised.
+    """
+    if not firebase_service or not firebase_service.is_connected():
+        return
+    
+    try:
+        if analysis_data is None or not playlist_id:
+            firebase_service.store_playlist(playlist_data)
+        else:
+            firebase_service.store_playlist_and_analysis(playlist_data, playlist_id, analysis_data)
+            # Drop the now-stale memoized lookups
+            _clear_analysis_cache()
+    except Exception as e:
+        logger.warning(f"Background Firebase write failed for playlist {playlist_id}: {e}")
+
+
+def _prewarm_analysis_cache() -> None:
+    """Load the analyses of the most recently updated playlists into the in-process cache."""
+    try:
+        for playlist in firebase_service.list_playlists(limit=PREWARM_PLAYLISTS):
+            _cached_analysis(playlist['playlist_id'])
+        logger.info("Analysis cache pre-warmed")
+    except Exception as e:
+        logger.warning(f"Analysis cache pre-warm failed: {e}")
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify() and request.get_json() skip stdlib json."""
+    
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+# Behind a server that honours X-Sendfile, let it stream course files from disk itself
+app.use_x_sendfile = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
+
+def json_response(obj, status: int = 200) -> Response:
+    """JSON response whose body is encoded straight to bytes, for large payloads."""
+    if orjson is None:
+        response = jsonify(obj)
+        response.status_code = status
+        return response
+    
+    payload = orjson.dumps(obj, default=app.json.default, option=orjson.OPT_NON_STR_KEYS)
+    return Response(payload, status=status, mimetype='application/json')
+
 
 # Global variables for components
 extractor = None
@@ -41,6 +182,21 @@ enhanced_analyzer = None
 generator = None
 firebase_service = None
 
+# Guards one-time component initialization across concurrent requests
+_INIT_LOCK = threading.Lock()
+_initialized = False
+
+
+def _ensure_components():
+    """Initialize application components once per process, even under concurrent requests."""
+    global _initialized
+    if _initialized:
+        return
+    with _INIT_LOCK:
+        if not _initialized:
+            initialize_components()
+            _initialized = True
+
 
 def initialize_components():
     """Initialize application components."""
@@ -52,10 +208,9 @@ def initialize_components():
     if not youtube_api_key or not google_ai_api_key:
         raise ValueError("Missing required API keys in environment variables")
     
-    extractor = YouTubeExtractor(youtube_api_key)
-    analyzer = ContentAnalyzer(google_ai_api_key, os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'))
-    enhanced_analyzer = EnhancedContentAnalyzer(google_ai_api_key, os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'))
-    generator = ModuleGenerator('output')
+    # One keep-alive connection pool shared by all outbound transcript requests
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
     
     # Initialize Firebase (optional)
     try:
@@ -63,11 +218,25 @@ def initialize_components():
         firebase_service = FirebaseService(firebase_path)
         if firebase_service.is_connected():
             logger.info("Firebase connected successfully")
+            threading.Thread(target=_prewarm_analysis_cache, daemon=True).start()
         else:
             logger.info("Firebase not configured (optional)")
     except Exception as e:
         logger.warning(f"Firebase initialization failed: {e}")
         firebase_service = None
+    
+    extractor = YouTubeExtractor(youtube_api_key, session=session)
+    # Per-video analyses are cached on disk and mirrored to Firebase when it's connected
+    analyzer = ContentAnalyzer(
+        google_ai_api_key, os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'),
+        cache=SQLiteCache(),
+        firebase_service=firebase_service if firebase_service and firebase_service.is_connected() else None
+    )
+    # Generated courses are cached on disk too, so re-processing a playlist skips Gemini
+    enhanced_analyzer = EnhancedContentAnalyzer(
+        google_ai_api_key, os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'), cache=analyzer.cache
+    )
+    generator = ModuleGenerator('output')
 
 
 @app.route('/')
@@ -91,38 +260,31 @@ def process_playlist():
             return jsonify({'error': 'Invalid YouTube playlist URL'}), 400
         
         # Initialize components if not already done
-        if not extractor:
-            initialize_components()
+        _ensure_components()
           # Process playlist
         logger.info(f"Processing playlist: {playlist_url}")
         
         # Extract playlist ID for Firebase
-        from urllib.parse import urlparse, parse_qs
-        parsed_url = urlparse(playlist_url)
-        playlist_id = parse_qs(parsed_url.query).get('list', [None])[0]
+        playlist_id = _playlist_id(playlist_url)
         
         # Check for existing data in Firebase
         existing_analysis = None
         if firebase_service and firebase_service.is_connected() and playlist_id:
-            existing_analysis = firebase_service.get_analysis_results(playlist_id)
+            existing_analysis = _cached_analysis(playlist_id)
             if existing_analysis:
                 logger.info("Using cached analysis from Firebase")
         
         # Step 1: Extract playlist data
         playlist_data = extractor.extract_playlist_data(playlist_url, max_videos)
         
-        # Store playlist data in Firebase
-        if firebase_service and firebase_service.is_connected():
-            firebase_service.store_playlist(playlist_data)
-        
-        # Step 2: Analyze content (use cached if available)
+        # Step 2: Analyze content (use cached if available), then store the playlist
+        # and any new analysis in Firebase together in the background
         if existing_analysis:
             analysis_results = existing_analysis
+            _IO_POOL.submit(_store_results, playlist_data, playlist_id)
         else:
             analysis_results = analyzer.analyze_playlist_content(playlist_data)
-            # Store analysis in Firebase
-            if firebase_service and firebase_service.is_connected() and playlist_id:
-                firebase_service.store_analysis_results(playlist_id, analysis_results)
+            _IO_POOL.submit(_store_results, playlist_data, playlist_id, analysis_results)
           # Step 3: Generate learning modules
         course_package = generator.generate_learning_modules(analysis_results)
         
@@ -132,7 +294,7 @@ def process_playlist():
             'course_info': course_package['course_info'],
             'modules': course_package['modules'],
             'total_modules': len(course_package['modules']),
-            'processing_time': datetime.now().isoformat()
+            'processing_time': _now_iso()
         })
         
     except Exception as e:
@@ -155,33 +317,25 @@ def generate_enhanced_course():
             return jsonify({'error': 'Invalid YouTube playlist URL'}), 400
         
         # Initialize components if not already done
-        if not extractor or not enhanced_analyzer:
-            initialize_components()
+        _ensure_components()
         
         # Process playlist
         logger.info(f"Generating enhanced course for playlist: {playlist_url}")
         
         # Extract playlist ID for Firebase
-        from urllib.parse import urlparse, parse_qs
-        parsed_url = urlparse(playlist_url)
-        playlist_id = parse_qs(parsed_url.query).get('list', [None])[0]
+        playlist_id = _playlist_id(playlist_url)
         
         # Step 1: Extract playlist data
         playlist_data = extractor.extract_playlist_data(playlist_url, max_videos)
         
-        # Store playlist data in Firebase if available
-        if firebase_service and firebase_service.is_connected():
-            firebase_service.store_playlist(playlist_data)
-        
         # Step 2: Generate comprehensive course structure
         course_structure = enhanced_analyzer.generate_comprehensive_course(playlist_data)
         
-        # Store enhanced course data in Firebase if available
-        if firebase_service and firebase_service.is_connected() and playlist_id:
-            firebase_service.store_analysis_results(playlist_id, course_structure)
+        # Store playlist data and the enhanced course in Firebase (if available) in the background
+        _IO_POOL.submit(_store_results, playlist_data, playlist_id, course_structure)
         
         # Return complete course structure
-        return jsonify(course_structure)
+        return json_response(course_structure)
         
     except Exception as e:
         logger.error(f"Error generating enhanced course: {e}", exc_info=True)
@@ -198,12 +352,13 @@ def validate_url():
         if not url:
             return jsonify({'valid': False, 'error': 'URL is required'})
         
+        # Same check as the processing endpoints
         is_valid = validate_youtube_url(url)
         
         if is_valid and extractor:
-            # Try to extract playlist ID to verify it exists
+            # Verify the playlist exists
             try:
-                playlist_id = extractor.extract_playlist_id(url)
+                playlist_id = _playlist_id(url)
                 if playlist_id:
                     playlist_info = extractor.get_playlist_info(playlist_id)
                     return jsonify({
@@ -224,11 +379,27 @@ def validate_url():
         return jsonify({'valid': False, 'error': str(e)})
 
 
+# Generated files are never rewritten (names carry a timestamp), so clients may cache them for a year
+COURSE_FILE_MAX_AGE = 365 * 24 * 3600
+_IMMUTABLE_PATHS = ('/api/download/', '/course/')
+
+
+@app.after_request
+def add_immutable_cache_headers(response):
+    """Mark served course files as immutable so browsers skip revalidation."""
+    if request.path.startswith(_IMMUTABLE_PATHS) and response.status_code in (200, 304):
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.cache_control.max_age = COURSE_FILE_MAX_AGE
+    return response
+
+
 @app.route('/api/download/<filename>')
 def download_file(filename):
     """Download generated files."""
     try:
-        return send_from_directory('output', filename, as_attachment=True)
+        return send_from_directory('output', filename, as_attachment=True, conditional=True,
+                                   etag=True, max_age=COURSE_FILE_MAX_AGE)
     except Exception as e:
         logger.error(f"Error downloading file: {e}")
         return jsonify({'error': 'File not found'}), 404
@@ -238,7 +409,8 @@ def download_file(filename):
 def view_course(filename):
     """View generated course files."""
     try:
-        return send_from_directory('output', filename)
+        return send_from_directory('output', filename, conditional=True, etag=True,
+                                   max_age=COURSE_FILE_MAX_AGE)
     except Exception as e:
         logger.error(f"Error viewing course file: {e}")
         return jsonify({'error': 'File not found'}), 404
@@ -249,12 +421,11 @@ def health_check():
     """Health check endpoint."""
     try:
         # Check if components are initialized
-        if not extractor:
-            initialize_components()
+        _ensure_components()
         
         return jsonify({
             'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now_iso(),
             'components': {
                 'youtube_extractor': extractor is not None,
                 'content_analyzer': analyzer is not None,
@@ -266,7 +437,7 @@ def health_check():
         return jsonify({
             'status': 'unhealthy',
             'error': str(e),
-            'timestamp': datetime.now().isoformat()
+            'timestamp': _now_iso()
         }), 500
 
 
@@ -342,9 +513,9 @@ def get_playlist_details(playlist_id):
             return jsonify({'error': 'Playlist not found'}), 404
         
         # Also get analysis if available
-        analysis_data = firebase_service.get_analysis_results(playlist_id)
+        analysis_data = _cached_analysis(playlist_id)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'playlist': playlist_data,
             'analysis': analysis_data
@@ -368,7 +539,7 @@ def get_playlist_videos(playlist_id):
         
         videos = playlist_data.get('videos', [])
         
-        return jsonify({
+        return json_response({
             'success': True,
             'playlist_id': playlist_id,
             'playlist_title': playlist_data.get('title', ''),
@@ -389,6 +560,7 @@ def delete_playlist(playlist_id):
             return jsonify({'error': 'Firebase not configured'}), 503
         
         success = firebase_service.delete_playlist(playlist_id)
+        _clear_analysis_cache()
         if not success:
             return jsonify({'error': 'Failed to delete playlist'}), 500
         
@@ -452,7 +624,7 @@ def get_playlist_video_links(playlist_id):
 if __name__ == '__main__':
     try:
         # Initialize components on startup
-        initialize_components()
+        _ensure_components()
         logger.info("Components initialized successfully")
         
         # Run the Flask app
@@ -6,18 +6,16 @@ Command-line interface for the YouTube Playlist Learning Module Generator.
 import os
 import sys
 import argparse
+import asyncio
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from dotenv import load_dotenv
 
-# Add src directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-
-from src.youtube_extractor import YouTubeExtractor
-from src.content_analyzer import ContentAnalyzer
-from src.module_generator import ModuleGenerator
-from src.firebase_service import FirebaseService
-from src.utils import validate_youtube_url, ProgressTracker
+# The pipeline modules (Google API clients, Gemini, Firebase) are imported where they're
+# used, so --help and argument errors don't pay for them
+from src.utils import validate_youtube_url, ProgressTracker, SQLiteCache
 
 # Load environment variables
 load_dotenv()
@@ -109,16 +107,17 @@ Examples:
         sys.exit(1)
     
     try:
+        from src.youtube_extractor import YouTubeExtractor
+        from src.content_analyzer import ContentAnalyzer
+        from src.module_generator import ModuleGenerator
+        from src.firebase_service import FirebaseService
+        
         # Initialize components
         print(f"🚀 Starting YouTube Playlist Learning Module Generator")
         print(f"📋 Playlist URL: {playlist_url}")
         print(f"📁 Output Directory: {args.output}")
         print(f"🎯 Max Videos: {args.max_videos}\n")
         
-        extractor = YouTubeExtractor(youtube_api_key)
-        analyzer = ContentAnalyzer(google_ai_api_key, args.model)
-        generator = ModuleGenerator(args.output)
-        
         # Initialize Firebase (optional)
         firebase_service = None
         firebase_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH')
@@ -131,6 +130,15 @@ Examples:
         except Exception as e:
             print(f"⚠️  Firebase initialization failed: {e}")
         
+        extractor = YouTubeExtractor(youtube_api_key)
+        # Per-video analyses are cached on disk (and in Firebase) so re-runs skip unchanged videos
+        analyzer = ContentAnalyzer(
+            google_ai_api_key, args.model,
+            cache=SQLiteCache(),
+            firebase_service=firebase_service if firebase_service and firebase_service.is_connected() else None
+        )
+        generator = ModuleGenerator(args.output)
+        
         # Extract playlist ID for Firebase storage
         from urllib.parse import urlparse, parse_qs
         parsed_url = urlparse(playlist_url)
@@ -143,38 +151,55 @@ Examples:
             if existing_playlist:
                 print(f"📚 Found existing playlist in database: {existing_playlist['title']}")
         
-        # Step 1: Extract playlist data
-        print("📥 Step 1: Extracting playlist data...")
-        playlist_data = extractor.extract_playlist_data(playlist_url, args.max_videos)
-        
-        print(f"✅ Extracted {playlist_data['total_videos']} videos")
-        print(f"📝 {playlist_data['videos_with_transcripts']} videos have transcripts")
-        
-        # Store playlist data in Firebase
-        if firebase_service and firebase_service.is_connected():
-            stored_id = firebase_service.store_playlist(playlist_data)
-            if stored_id:
-                print(f"🔥 Playlist data stored in Firebase with ID: {stored_id}")
-        
-        print()
-        
-        # Step 2: Analyze content
-        print("🧠 Step 2: Analyzing content with AI...")
-        
-        # Check for existing analysis in Firebase
+        # Reuse a stored analysis if there is one; otherwise analyze videos while the rest
+        # of the playlist is still being extracted
         existing_analysis = None
         if firebase_service and firebase_service.is_connected() and playlist_id:
             existing_analysis = firebase_service.get_analysis_results(playlist_id)
+        
+        with ThreadPoolExecutor(max_workers=1) as pipeline:
+            video_analyses_future = None
+            if not existing_analysis:
+                video_queue = queue.Queue()
+                video_analyses_future = pipeline.submit(analyzer.analyze_video_stream, video_queue)
+            
+            def queue_video(video):
+                if video_analyses_future is not None and video.get('transcript'):
+                    video_queue.put(video)
+            
+            # Step 1: Extract playlist data
+            print("📥 Step 1: Extracting playlist data...")
+            try:
+                playlist_data = extractor.extract_playlist_data(playlist_url, args.max_videos, on_video=queue_video)
+            finally:
+                if video_analyses_future is not None:
+                    video_queue.put(None)
+            
+            print(f"✅ Extracted {playlist_data['total_videos']} videos")
+            print(f"📝 {playlist_data['videos_with_transcripts']} videos have transcripts")
+            
+            # Store playlist data in Firebase
+            if firebase_service and firebase_service.is_connected():
+                stored_id = firebase_service.store_playlist(playlist_data)
+                if stored_id:
+                    print(f"🔥 Playlist data stored in Firebase with ID: {stored_id}")
+            
+            print()
+            
+            # Step 2: Analyze content
+            print("🧠 Step 2: Analyzing content with AI...")
+            
             if existing_analysis:
                 print("📚 Found existing analysis in database, using cached results")
                 analysis_results = existing_analysis
             else:
-                analysis_results = analyzer.analyze_playlist_content(playlist_data)
-                # Store analysis results
-                firebase_service.store_analysis_results(playlist_id, analysis_results)
-                print("🔥 Analysis results stored in Firebase")
-        else:
-            analysis_results = analyzer.analyze_playlist_content(playlist_data)
+                analysis_results = asyncio.run(analyzer.analyze_playlist_content_async(
+                    playlist_data, video_analyses=video_analyses_future.result()
+                ))
+                if firebase_service and firebase_service.is_connected() and playlist_id:
+                    # Store analysis results
+                    firebase_service.store_analysis_results(playlist_id, analysis_results)
+                    print("🔥 Analysis results stored in Firebase")
         
         print(f"✅ Analysis complete")
         print(f"📚 Subject: {analysis_results.get('structure_analysis', {}).get('subject', 'Unknown')}")
@@ -232,6 +257,9 @@ def test_connection():
         return False
     
     try:
+        from src.youtube_extractor import YouTubeExtractor
+        from src.content_analyzer import ContentAnalyzer
+        
         # Test YouTube API
         extractor = YouTubeExtractor(youtube_api_key)
         test_url = "https://www.youtube.com/playlist?list=PLrAXtmRdnEQy6nuLMfqVYjeQsS2WY1-3k"
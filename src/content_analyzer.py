@@ -4,46 +4,171 @@ This module uses Google's Gemini AI models to analyze video content and extract
 key information for learning module generation.
 """
 
+import io
+import copy
 import os
+import asyncio
+import functools
+import queue
 import logging
-from typing import Dict, List, Optional, Any
+import hashlib
+import threading
+from typing import Dict, List, Optional, Any, Tuple, Union
 import json
 import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import google.generativeai as genai
 
+from .utils import extract_json
+
+# Import orjson with fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Part of every analysis cache key; bump it when the prompts change so stale analyses aren't reused
+PROMPT_VERSION = "v1"
+
+# ISO 8601 video duration as returned by the YouTube Data API, e.g. PT1H4M13S
+_ISO_DURATION_RE = re.compile(r'^PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$')
+
+# Used when Gemini can't produce objectives / prerequisites, or there's nothing to analyze
+DEFAULT_LEARNING_OBJECTIVES = (
+    "Understand the main concepts presented in the course",
+    "Apply the knowledge gained to practical situations",
+    "Analyze the relationships between different topics",
+    "Evaluate the effectiveness of different approaches",
+)
+DEFAULT_PREREQUISITES = ("Basic understanding of the subject area",)
+
+# Response schemas for JSON mode, matching the fields each prompt asks for
+_STRUCTURE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "subject": {"type": "STRING"},
+        "themes": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "organization": {"type": "STRING", "enum": ["sequential", "thematic", "mixed"]},
+        "audience_level": {"type": "STRING", "enum": ["beginner", "intermediate", "advanced"]},
+        "approach": {"type": "STRING", "enum": ["theoretical", "practical", "mixed"]},
+    },
+    "required": ["subject", "themes", "organization", "audience_level", "approach"],
+}
+_VIDEO_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "key_concepts": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "summary": {"type": "STRING"},
+        "difficulty": {"type": "STRING", "enum": ["beginner", "intermediate", "advanced"]},
+        "learning_outcomes": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["key_concepts", "summary", "difficulty", "learning_outcomes"],
+}
+_VIDEO_BATCH_SCHEMA = {"type": "ARRAY", "items": _VIDEO_SCHEMA}
+_STRING_LIST_SCHEMA = {"type": "ARRAY", "items": {"type": "STRING"}}
+
+# API key genai is currently configured with, shared by every ContentAnalyzer
+_configure_lock = threading.Lock()
+_configured_api_key: Optional[str] = None
+
+# Content complexity indicators for the difficulty heuristic, matched together in a single scan
+_ADVANCED_INDICATORS = ('advanced', 'complex', 'sophisticated', 'expert', 'master')
+_BEGINNER_INDICATORS = ('introduction', 'basic', 'fundamental', 'getting started', 'beginner')
+_DIFFICULTY_INDICATOR_RE = re.compile('|'.join(map(re.escape, _ADVANCED_INDICATORS + _BEGINNER_INDICATORS)))
+
+
+def _configure_genai(api_key: str) -> None:
+    """Apply genai.configure, which is process-global, only when the API key changes."""
+    global _configured_api_key
+    with _configure_lock:
+        if api_key != _configured_api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+
+
+def _make_generation_config(max_output_tokens: int, response_schema: Optional[Dict] = None) -> Any:
+    """Build a generation config, asking for bare (schema-shaped) JSON where supported."""
+    settings = dict(temperature=0.3, top_p=0.8, top_k=40, max_output_tokens=max_output_tokens)
+    # JSON mode (google-generativeai >= 0.5) returns bare JSON, and a response schema
+    # (>= 0.6) pins its shape, so the text fallbacks rarely run; older SDKs reject both
+    attempts = [dict(response_mime_type="application/json"), {}]
+    if response_schema is not None:
+        attempts.insert(0, dict(response_mime_type="application/json", response_schema=response_schema))
+    for extra in attempts[:-1]:
+        try:
+            return genai.types.GenerationConfig(**extra, **settings)
+        except TypeError:
+            continue
+    return genai.types.GenerationConfig(**settings)
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON, using orjson when it's installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _json_dumps(obj: Any) -> Union[str, bytes]:
+    """Encode JSON for the analysis cache, as bytes when orjson is installed."""
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj, ensure_ascii=False)
+
 
 class ContentAnalyzer:
     """Handles AI-powered content analysis using Google Gemini."""
     
-    def __init__(self, api_key: str, model: str = "gemini-1.5-flash"):
+    # Generation settings for consistent responses; identical for every instance. Output
+    # budgets are sized per prompt so short answers don't reserve the batch-sized budget
+    generation_config = _make_generation_config(2048, _VIDEO_BATCH_SCHEMA)
+    structure_config = _make_generation_config(768, _STRUCTURE_SCHEMA)
+    video_config = _make_generation_config(512, _VIDEO_SCHEMA)
+    list_config = _make_generation_config(384, _STRING_LIST_SCHEMA)
+    
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash", max_workers: int = 8,
+                 cache: Optional[Any] = None, cache_ttl: int = 30 * 24 * 3600,
+                 firebase_service: Optional[Any] = None, batch_size: int = 6,
+                 memory_cache_size: int = 512):
         """Initialize Gemini client.
         
         Args:
             api_key: Google AI API key
             model: Gemini model to use
+            max_workers: Maximum number of concurrent Gemini requests
+            cache: Redis-compatible (get/setex) cache for per-video and structure analyses,
+                e.g. utils.SQLiteCache
+            cache_ttl: Seconds a cached analysis stays valid
+            firebase_service: FirebaseService the cached analyses are mirrored to, if any
+            batch_size: Number of videos analyzed per Gemini request
+            memory_cache_size: Number of analyses kept in memory
         """
-        genai.configure(api_key=api_key)
+        _configure_genai(api_key)
         self.model_name = model
         self.model = genai.GenerativeModel(model)
-        
-        # Configure generation settings for consistent responses
-        self.generation_config = genai.types.GenerationConfig(
-            temperature=0.3,
-            top_p=0.8,
-            top_k=40,
-            max_output_tokens=2048,
-        )
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.firebase_service = firebase_service
+        # In-memory LRU in front of the cache, so identical prompts are answered once per
+        # process even without a disk cache
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        # Firestore mirror writes happen off the analysis path
+        self._mirror_pool = ThreadPoolExecutor(max_workers=2) if firebase_service is not None else None
     
-    def analyze_playlist_content(self, playlist_data: Dict) -> Dict:
+    def analyze_playlist_content(self, playlist_data: Dict,
+                                 video_analyses: Optional[List[Dict]] = None) -> Dict:
         """Analyze entire playlist content and structure.
         
         Args:
             playlist_data: Complete playlist data from YouTubeExtractor
+            video_analyses: Per-video analyses already produced by analyze_video_stream;
+                computed here when omitted
             
         Returns:
             Analysis results with learning structure
@@ -53,25 +178,139 @@ class ContentAnalyzer:
         # Prepare content summary for analysis
         content_summary = self._prepare_content_summary(playlist_data)
         
-        # Analyze overall structure and themes
-        structure_analysis = self._analyze_content_structure(content_summary)
+        # Without any transcripts there's nothing for Gemini to analyze
+        if not any(video.get('transcript') for video in playlist_data['videos']):
+            return self._default_analysis(playlist_data, content_summary)
         
-        # Analyze individual videos
-        video_analyses = []
-        for video in playlist_data['videos']:
-            if video.get('transcript'):
-                analysis = self._analyze_video_content(video)
-                video_analyses.append(analysis)
+        # Objectives and prerequisites only need an overview; the structure prompt gets the full summary
+        short_summary = self._prepare_short_summary(playlist_data)
+        
+        # The Gemini calls are network-bound, so they run concurrently; the worker
+        # count caps the number of in-flight requests
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Analyze overall structure and themes, and identify prerequisite knowledge
+            structure_future = executor.submit(self._analyze_content_structure, content_summary)
+            prerequisites_future = executor.submit(self._identify_prerequisites, short_summary)
+            
+            # Analyze individual videos (results keep playlist order): cached analyses
+            # are reused, the rest are analyzed several videos per Gemini request
+            videos = [video for video in playlist_data['videos'] if video.get('transcript')]
+            if video_analyses is None:
+                video_analyses = list(executor.map(self._cached_video_analysis, videos))
+            else:
+                video_analyses = list(video_analyses)
+            pending, duplicates = self._unique_pending(videos, video_analyses)
+            batch_futures = [
+                (batch, executor.submit(self._analyze_video_batch, [videos[i] for i in batch]))
+                for batch in (pending[start:start + self.batch_size]
+                              for start in range(0, len(pending), self.batch_size))
+            ]
+            
+            # Generate learning objectives once the structure is known
+            structure_analysis = structure_future.result()
+            objectives_future = executor.submit(
+                self._generate_learning_objectives, short_summary, structure_analysis
+            )
+            
+            for batch, future in batch_futures:
+                for i, analysis in zip(batch, future.result()):
+                    video_analyses[i] = analysis
+            for i, original in duplicates:
+                video_analyses[i] = self._with_video_metadata(video_analyses[original], videos[i])
+            learning_objectives = objectives_future.result()
+            prerequisites = prerequisites_future.result()
+        
+        return self._build_analysis(playlist_data, content_summary, structure_analysis,
+                                    video_analyses, learning_objectives, prerequisites)
+    
+    async def analyze_playlist_content_async(self, playlist_data: Dict,
+                                             video_analyses: Optional[List[Dict]] = None,
+                                             max_concurrency: int = 16) -> Dict:
+        """Analyze entire playlist content and structure on the event loop.
+        
+        Per-video Gemini requests use the SDK's async API, so many can be in flight
+        without a thread each; the one-off playlist-level prompts and the cache
+        lookups run on the default executor.
         
-        # Generate learning objectives
-        learning_objectives = self._generate_learning_objectives(content_summary, structure_analysis)
+        Args:
+            playlist_data: Complete playlist data from YouTubeExtractor
+            video_analyses: Per-video analyses already produced by analyze_video_stream;
+                computed here when omitted
+            max_concurrency: Maximum number of in-flight per-video Gemini requests
+            
+        Returns:
+            Analysis results with learning structure
+        """
+        logger.info("Starting async playlist content analysis with Gemini...")
+        
+        content_summary = self._prepare_content_summary(playlist_data)
+        if not any(video.get('transcript') for video in playlist_data['videos']):
+            return self._default_analysis(playlist_data, content_summary)
+        short_summary = self._prepare_short_summary(playlist_data)
         
-        # Identify prerequisite knowledge
-        prerequisites = self._identify_prerequisites(content_summary)
+        videos = [video for video in playlist_data['videos'] if video.get('transcript')]
+        if video_analyses is None:
+            video_analyses = await asyncio.gather(
+                *(self._run_blocking(self._cached_video_analysis, video) for video in videos)
+            )
+        video_analyses = list(video_analyses)
+        pending, duplicates = self._unique_pending(videos, video_analyses)
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def analyze_batch(batch):
+            async with semaphore:
+                return await self._analyze_video_batch_async([videos[i] for i in batch])
+        
+        async def structure_and_objectives():
+            # Learning objectives need the structure analysis
+            structure = await self._run_blocking(self._analyze_content_structure, content_summary)
+            objectives = await self._run_blocking(self._generate_learning_objectives, short_summary, structure)
+            return structure, objectives
+        
+        (structure_analysis, learning_objectives), prerequisites, batch_results = await asyncio.gather(
+            structure_and_objectives(),
+            self._run_blocking(self._identify_prerequisites, short_summary),
+            asyncio.gather(*(analyze_batch(batch) for batch in batches))
+        )
+        for batch, results in zip(batches, batch_results):
+            for i, analysis in zip(batch, results):
+                video_analyses[i] = analysis
+        for i, original in duplicates:
+            video_analyses[i] = self._with_video_metadata(video_analyses[original], videos[i])
+        
+        return self._build_analysis(playlist_data, content_summary, structure_analysis,
+                                    video_analyses, learning_objectives, prerequisites)
+    
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the event loop's default executor.
         
-        # Suggest learning path
-        learning_path = self._suggest_learning_path(video_analyses, structure_analysis)
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            
+        Returns:
+            Whatever func returns
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+    
+    def _build_analysis(self, playlist_data: Dict, content_summary: str, structure_analysis: Dict,
+                        video_analyses: List[Dict], learning_objectives: List[str],
+                        prerequisites: List[str]) -> Dict:
+        """Assemble the analysis results, adding the locally computed parts.
         
+        Args:
+            playlist_data: Complete playlist data
+            content_summary: Content summary the prompts were built from
+            structure_analysis: Overall structure analysis
+            video_analyses: Analysis results for the videos with transcripts
+            learning_objectives: Course learning objectives
+            prerequisites: Prerequisite knowledge
+            
+        Returns:
+            Analysis results with learning structure
+        """
         return {
             'playlist_title': playlist_data['playlist_info']['title'],
             'content_summary': content_summary,
@@ -79,11 +318,80 @@ class ContentAnalyzer:
             'video_analyses': video_analyses,
             'learning_objectives': learning_objectives,
             'prerequisites': prerequisites,
-            'learning_path': learning_path,
+            'learning_path': self._suggest_learning_path(video_analyses, structure_analysis),
             'difficulty_level': self._assess_difficulty_level(content_summary),
             'estimated_completion_time': self._estimate_completion_time(playlist_data['videos'])
         }
     
+    def _default_analysis(self, playlist_data: Dict, content_summary: str) -> Dict:
+        """Build the analysis for a playlist without any transcripts, without calling Gemini.
+        
+        Every Gemini call would just fall back to defaults, so the network is skipped.
+        
+        Args:
+            playlist_data: Complete playlist data
+            content_summary: Content summary
+            
+        Returns:
+            Default analysis results
+        """
+        logger.warning("No videos have transcripts; returning default analysis")
+        return self._build_analysis(playlist_data, content_summary, self._parse_structure_response(''),
+                                    [], list(DEFAULT_LEARNING_OBJECTIVES), list(DEFAULT_PREREQUISITES))
+    
+    def analyze_video_stream(self, video_queue: "queue.Queue[Optional[Dict]]") -> List[Dict]:
+        """Analyze videos as they arrive on a queue, until a None sentinel.
+        
+        Runs alongside extraction: cached analyses are reused, and the remaining
+        videos go to Gemini batch_size at a time as soon as a batch fills up.
+        
+        Args:
+            video_queue: Videos with transcripts, in playlist order, then None
+            
+        Returns:
+            Video analyses in the order the videos were queued
+        """
+        videos = []
+        video_analyses = []
+        batch = []
+        batch_futures = []
+        first_by_key = {}
+        duplicates = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def submit_batch():
+                batch_futures.append((batch, executor.submit(self._analyze_video_batch, [videos[i] for i in batch])))
+            
+            while True:
+                video = video_queue.get()
+                if video is None:
+                    break
+                
+                position = len(videos)
+                videos.append(video)
+                analysis = self._cached_video_analysis(video)
+                video_analyses.append(analysis)
+                if analysis is None:
+                    # Identical prompts earlier in the playlist are only sent once
+                    key = self._cache_key(self._video_prompt(video))
+                    if key in first_by_key:
+                        duplicates.append((position, first_by_key[key]))
+                        continue
+                    first_by_key[key] = position
+                    batch.append(position)
+                    if len(batch) == self.batch_size:
+                        submit_batch()
+                        batch = []
+            
+            if batch:
+                submit_batch()
+            for batch, future in batch_futures:
+                for i, analysis in zip(batch, future.result()):
+                    video_analyses[i] = analysis
+        
+        for i, original in duplicates:
+            video_analyses[i] = self._with_video_metadata(video_analyses[original], videos[i])
+        return video_analyses
+    
     def _prepare_content_summary(self, playlist_data: Dict) -> str:
         """Prepare a summary of all content for analysis.
         
@@ -93,27 +401,110 @@ class ContentAnalyzer:
         Returns:
             Content summary string
         """
-        summary_parts = []
+        buf = io.StringIO()
         
         # Add playlist info
         playlist_info = playlist_data['playlist_info']
-        summary_parts.append(f"Playlist: {playlist_info['title']}")
-        summary_parts.append(f"Description: {playlist_info['description']}")
-        summary_parts.append(f"Total Videos: {len(playlist_data['videos'])}")
-        summary_parts.append("")
+        buf.write(f"Playlist: {playlist_info['title']}\n")
+        buf.write(f"Description: {playlist_info['description']}\n")
+        buf.write(f"Total Videos: {len(playlist_data['videos'])}\n\n")
         
         # Add video summaries
         for i, video in enumerate(playlist_data['videos'][:10], 1):  # Limit to first 10 videos
-            summary_parts.append(f"Video {i}: {video['title']}")
+            buf.write(f"Video {i}: {video['title']}\n")
             if video['description']:
-                summary_parts.append(f"Description: {video['description'][:200]}...")
-            if video.get('transcript'):
+                buf.write(f"Description: {video['description'][:200]}...\n")
+            transcript = video.get('transcript')
+            if transcript:
                 # Use first 500 characters of transcript
-                transcript_preview = video['transcript'][:500] + "..." if len(video['transcript']) > 500 else video['transcript']
-                summary_parts.append(f"Transcript preview: {transcript_preview}")
-            summary_parts.append("")
+                buf.write("Transcript preview: ")
+                buf.write(transcript[:500])
+                buf.write("...\n" if len(transcript) > 500 else "\n")
+            buf.write("\n")
+        
+        # Every line above is newline-terminated; drop the last one to match a "\n".join
+        return buf.getvalue()[:-1]
+    
+    def _prepare_short_summary(self, playlist_data: Dict, limit: int = 1200) -> str:
+        """Prepare a short overview of the playlist for the objectives and prerequisites prompts.
+        
+        Lists video titles with the start of each description, stopping once the limit
+        is reached instead of building the full summary and slicing it.
+        
+        Args:
+            playlist_data: Complete playlist data
+            limit: Maximum length in characters
+            
+        Returns:
+            Short content summary string
+        """
+        buf = io.StringIO()
+        playlist_info = playlist_data['playlist_info']
+        buf.write(f"Playlist: {playlist_info['title']}\n")
+        buf.write(f"Description: {playlist_info['description'][:200]}\n")
+        
+        for i, video in enumerate(playlist_data['videos'], 1):
+            if buf.tell() >= limit:
+                break
+            buf.write(f"Video {i}: {video['title']}\n")
+            if video['description']:
+                buf.write(f"  {video['description'][:80]}\n")
         
-        return "\n".join(summary_parts)
+        return buf.getvalue()[:limit]
+    
+    def _stream_json(self, prompt: str, generation_config: Any) -> Tuple[str, Optional[str]]:
+        """Stream a Gemini completion, stopping as soon as a complete JSON object arrives.
+        
+        Anything the model appends after the object is never waited for.
+        
+        Args:
+            prompt: Prompt to send
+            generation_config: Generation config for the request
+            
+        Returns:
+            The response text read so far and the balanced JSON object in it, or None
+        """
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+        chunks = []
+        json_text = None
+        for chunk in response:
+            chunks.append(chunk.text)
+            if '}' in chunk.text:
+                json_text = extract_json("".join(chunks))
+                if json_text is not None:
+                    break
+        
+        return "".join(chunks).strip(), json_text
+    
+    async def _stream_json_async(self, prompt: str, generation_config: Any) -> Tuple[str, Optional[str]]:
+        """Async variant of _stream_json.
+        
+        Args:
+            prompt: Prompt to send
+            generation_config: Generation config for the request
+            
+        Returns:
+            The response text read so far and the balanced JSON object in it, or None
+        """
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+        chunks = []
+        json_text = None
+        async for chunk in response:
+            chunks.append(chunk.text)
+            if '}' in chunk.text:
+                json_text = extract_json("".join(chunks))
+                if json_text is not None:
+                    break
+        
+        return "".join(chunks).strip(), json_text
     
     def _analyze_content_structure(self, content_summary: str) -> Dict:
         """Analyze the overall structure and themes of the content.
@@ -139,17 +530,17 @@ class ContentAnalyzer:
         Respond with ONLY a valid JSON object, no other text.
         """
         
+        cache_key = self._cache_key(prompt)
+        cached = self._get_cached_analysis(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            content, json_text = self._stream_json(prompt, self.structure_config)
+            if json_text:
+                structure_analysis = _json_loads(json_text)
+                self._set_cached_analysis(cache_key, structure_analysis)
+                return structure_analysis
             else:
                 # Fallback parsing
                 return self._parse_structure_response(content)
@@ -183,7 +574,45 @@ class ContentAnalyzer:
                 'duration_minutes': 0
             }
         
-        prompt = f"""
+        prompt = self._video_prompt(video)
+        
+        # Keyed on the full prompt, so an unchanged video (title, description and
+        # transcript) is never sent to Gemini twice, whichever playlist it's in
+        cache_key = self._cache_key(prompt)
+        
+        try:
+            analysis = self._get_cached_analysis(cache_key)
+            if analysis is None:
+                content, json_text = self._stream_json(prompt, self.video_config)
+                if json_text:
+                    analysis = _json_loads(json_text)
+                    self._set_cached_analysis(cache_key, analysis)
+                else:
+                    analysis = self._parse_video_response(content)
+            
+            return self._with_video_metadata(analysis, video)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing video {video['video_id']}: {e}")
+            return {
+                'video_id': video['video_id'],
+                'title': video['title'],
+                'key_concepts': [],
+                'summary': f"Analysis failed: {str(e)}",
+                'difficulty': "unknown",
+                'learning_outcomes': []
+            }
+    
+    def _video_prompt(self, video: Dict) -> str:
+        """Build the single-video analysis prompt.
+        
+        Args:
+            video: Video data with transcript
+            
+        Returns:
+            Prompt text
+        """
+        return f"""
         You are an educational content analyst. Analyze this video content:
 
         Title: {video['title']}
@@ -198,26 +627,115 @@ class ContentAnalyzer:
 
         Respond with ONLY a valid JSON object, no other text.
         """
+    
+    def _with_video_metadata(self, analysis: Dict, video: Dict) -> Dict:
+        """Attach video metadata to an analysis.
+        
+        Args:
+            analysis: Parsed video analysis
+            video: Video the analysis belongs to
+            
+        Returns:
+            New analysis dictionary including the video metadata
+        """
+        return {
+            **analysis,
+            'video_id': video['video_id'],
+            'title': video['title'],
+            'position': video.get('position', 0)
+        }
+    
+    def _cached_video_analysis(self, video: Dict) -> Optional[Dict]:
+        """Get a video's cached analysis, if any.
+        
+        Args:
+            video: Video data with transcript
+            
+        Returns:
+            Cached analysis with video metadata, or None on a miss
+        """
+        analysis = self._get_cached_analysis(self._cache_key(self._video_prompt(video)))
+        return self._with_video_metadata(analysis, video) if analysis is not None else None
+    
+    def _analyze_video_batch(self, videos: List[Dict]) -> List[Dict]:
+        """Analyze several videos with a single Gemini request.
+        
+        Falls back to one request per video if the batched response can't be matched
+        up with the videos.
+        
+        Args:
+            videos: Videos with transcripts
+            
+        Returns:
+            Video analysis results, in the same order as `videos`
+        """
+        if len(videos) == 1:
+            return [self._analyze_video_content(videos[0])]
         
         try:
             response = self.model.generate_content(
-                prompt,
+                self._batch_prompt(videos),
                 generation_config=self.generation_config
             )
             
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                analysis = json.loads(json_match.group())
+            results = self._parse_batch_response(response.text.strip(), videos)
+            if results is not None:
+                return results
+            
+            logger.warning(f"Batched analysis of {len(videos)} videos was unusable, analyzing them one by one")
+            
+        except Exception as e:
+            logger.error(f"Error analyzing batch of {len(videos)} videos: {e}")
+        
+        return [self._analyze_video_content(video) for video in videos]
+    
+    async def _analyze_video_batch_async(self, videos: List[Dict]) -> List[Dict]:
+        """Analyze several uncached videos with a single async Gemini request.
+        
+        Args:
+            videos: Videos with transcripts whose analyses aren't cached
+            
+        Returns:
+            Video analysis results, in the same order as `videos`
+        """
+        if len(videos) > 1:
+            try:
+                response = await self.model.generate_content_async(
+                    self._batch_prompt(videos),
+                    generation_config=self.generation_config
+                )
+                
+                results = self._parse_batch_response(response.text.strip(), videos)
+                if results is not None:
+                    return results
+                
+                logger.warning(f"Batched analysis of {len(videos)} videos was unusable, analyzing them one by one")
+                
+            except Exception as e:
+                logger.error(f"Error analyzing batch of {len(videos)} videos: {e}")
+        
+        return list(await asyncio.gather(*(self._analyze_video_content_async(video) for video in videos)))
+    
+    async def _analyze_video_content_async(self, video: Dict) -> Dict:
+        """Analyze an uncached video with the async Gemini API.
+        
+        Args:
+            video: Video data with transcript
+            
+        Returns:
+            Video analysis results
+        """
+        prompt = self._video_prompt(video)
+        
+        try:
+            content, json_text = await self._stream_json_async(prompt, self.video_config)
+            if json_text:
+                analysis = _json_loads(json_text)
+                self._set_cached_analysis(self._cache_key(prompt), analysis)
             else:
                 analysis = self._parse_video_response(content)
             
-            # Add video metadata
-            analysis['video_id'] = video['video_id']
-            analysis['title'] = video['title']
-            analysis['position'] = video.get('position', 0)
-            
-            return analysis
+            return self._with_video_metadata(analysis, video)
             
         except Exception as e:
             logger.error(f"Error analyzing video {video['video_id']}: {e}")
@@ -230,11 +748,179 @@ class ContentAnalyzer:
                 'learning_outcomes': []
             }
     
+    def _batch_prompt(self, videos: List[Dict]) -> str:
+        """Build the multi-video analysis prompt.
+        
+        Args:
+            videos: Videos with transcripts
+            
+        Returns:
+            Prompt text
+        """
+        # Keep the combined prompt about the size of a single-video one
+        transcript_chars = min(2000, 8000 // len(videos))
+        sections = "\n\n".join(
+            f"### Video {i}\n"
+            f"Title: {video['title']}\n"
+            f"Description: {video.get('description', '')[:300]}\n"
+            f"Transcript: {video['transcript'][:transcript_chars]}..."
+            for i, video in enumerate(videos, 1)
+        )
+        return f"""
+        You are an educational content analyst. Analyze each of these {len(videos)} videos:
+
+        {sections}
+
+        Provide a JSON array with exactly one object per video, in the same order, each with:
+        1. "key_concepts": Key concepts covered (array of strings)
+        2. "summary": Brief summary in 2-3 sentences (string)
+        3. "difficulty": Difficulty level - "beginner", "intermediate", or "advanced" (string)
+        4. "learning_outcomes": Main learning outcomes (array of strings)
+
+        Respond with ONLY a valid JSON array, no other text.
+        """
+    
+    def _parse_batch_response(self, content: str, videos: List[Dict]) -> Optional[List[Dict]]:
+        """Match a batched analysis response up with its videos, caching each analysis.
+        
+        Args:
+            content: Raw response text
+            videos: Videos the request covered
+            
+        Returns:
+            Video analysis results in the same order as `videos`, or None if the
+            response doesn't hold exactly one analysis object per video
+        """
+        json_text = extract_json(content, '[', ']')
+        analyses = _json_loads(json_text) if json_text else None
+        if not (isinstance(analyses, list) and len(analyses) == len(videos)
+                and all(isinstance(analysis, dict) for analysis in analyses)):
+            return None
+        
+        results = []
+        for video, analysis in zip(videos, analyses):
+            self._set_cached_analysis(self._cache_key(self._video_prompt(video)), analysis)
+            results.append(self._with_video_metadata(analysis, video))
+        return results
+    
+    def _cache_key(self, prompt: str) -> str:
+        """Build the analysis cache key for a prompt.
+        
+        Args:
+            prompt: Prompt sent to Gemini
+            
+        Returns:
+            Cache key
+        """
+        digest = hashlib.sha256(f"{self.model_name}|{PROMPT_VERSION}|{prompt}".encode()).hexdigest()
+        return f"analysis:{digest}"
+    
+    def _get_cached_analysis(self, key: str) -> Optional[Dict]:
+        """Look up a cached analysis in memory, on disk, then in Firestore.
+        
+        Args:
+            key: Analysis cache key
+            
+        Returns:
+            Cached analysis (the caller's own copy), or None on a miss
+        """
+        with self._memory_lock:
+            analysis = self._memory_cache.get(key)
+            if analysis is not None:
+                self._memory_cache.move_to_end(key)
+                return copy.deepcopy(analysis)
+        
+        if self.cache is not None:
+            try:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    analysis = _json_loads(cached)
+                    self._remember_analysis(key, analysis)
+                    return analysis
+            except Exception as e:
+                logger.warning(f"Analysis cache lookup failed: {e}")
+        
+        if self.firebase_service is not None:
+            analysis = self.firebase_service.get_cached_video_analysis(key)
+            if analysis is not None:
+                self._set_local_analysis(key, analysis)
+                return analysis
+        
+        return None
+    
+    def _set_cached_analysis(self, key: str, analysis: Dict) -> None:
+        """Cache an analysis locally and mirror it to Firestore in the background.
+        
+        Args:
+            key: Analysis cache key
+            analysis: Parsed analysis returned by Gemini
+        """
+        self._set_local_analysis(key, analysis)
+        if self._mirror_pool is not None:
+            self._mirror_pool.submit(self.firebase_service.cache_video_analysis, key, analysis)
+    
+    def _set_local_analysis(self, key: str, analysis: Dict) -> None:
+        """Store an analysis in memory and in the local cache, if any.
+        
+        Args:
+            key: Analysis cache key
+            analysis: Analysis to store
+        """
+        self._remember_analysis(key, analysis)
+        if self.cache is None:
+            return
+        try:
+            self.cache.setex(key, self.cache_ttl, _json_dumps(analysis))
+        except Exception as e:
+            logger.warning(f"Analysis cache store failed: {e}")
+    
+    def _remember_analysis(self, key: str, analysis: Dict) -> None:
+        """Keep a copy of an analysis in the in-memory LRU, evicting the least recently used.
+        
+        Args:
+            key: Analysis cache key
+            analysis: Analysis to keep
+        """
+        analysis = copy.deepcopy(analysis)
+        with self._memory_lock:
+            self._memory_cache[key] = analysis
+            self._memory_cache.move_to_end(key)
+            if len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
+    
+    def _unique_pending(self, videos: List[Dict],
+                        video_analyses: List[Optional[Dict]]) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Pick the uncached videos that need a Gemini request, one per distinct prompt.
+        
+        Series boilerplate (intros, outros, reuploads) often yields identical prompts
+        within a playlist; only the first of those is sent.
+        
+        Args:
+            videos: Videos with transcripts
+            video_analyses: Cached analyses, None where a video still needs one
+            
+        Returns:
+            Positions to analyze, and (duplicate, original) position pairs to copy afterwards
+        """
+        pending = []
+        duplicates = []
+        first_by_key = {}
+        for i, analysis in enumerate(video_analyses):
+            if analysis is not None:
+                continue
+            key = self._cache_key(self._video_prompt(videos[i]))
+            if key in first_by_key:
+                duplicates.append((i, first_by_key[key]))
+            else:
+                first_by_key[key] = i
+                pending.append(i)
+        return pending, duplicates
+    
     def _generate_learning_objectives(self, content_summary: str, structure_analysis: Dict) -> List[str]:
         """Generate learning objectives for the entire course.
         
         Args:
-            content_summary: Summary of all content
+            content_summary: Short summary of all content (see _prepare_short_summary)
             structure_analysis: Structure analysis results
             
         Returns:
@@ -248,7 +934,7 @@ class ContentAnalyzer:
         Audience Level: {structure_analysis.get('audience_level', 'intermediate')}
 
         Content Summary:
-        {content_summary[:1000]}...
+        {content_summary}...
 
         Generate learning objectives that are:
         - Specific and measurable
@@ -262,13 +948,13 @@ class ContentAnalyzer:
         try:
             response = self.model.generate_content(
                 prompt,
-                generation_config=self.generation_config
+                generation_config=self.list_config
             )
             
             content = response.text.strip()
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            json_text = extract_json(content, '[', ']')
+            if json_text:
+                return _json_loads(json_text)
             else:
                 # Extract objectives from text
                 objectives = []
@@ -282,18 +968,13 @@ class ContentAnalyzer:
                 
         except Exception as e:
             logger.error(f"Error generating learning objectives: {e}")
-            return [
-                "Understand the main concepts presented in the course",
-                "Apply the knowledge gained to practical situations",
-                "Analyze the relationships between different topics",
-                "Evaluate the effectiveness of different approaches"
-            ]
+            return list(DEFAULT_LEARNING_OBJECTIVES)
     
     def _identify_prerequisites(self, content_summary: str) -> List[str]:
         """Identify prerequisite knowledge needed.
         
         Args:
-            content_summary: Summary of all content
+            content_summary: Short summary of all content (see _prepare_short_summary)
             
         Returns:
             List of prerequisites
@@ -301,7 +982,7 @@ class ContentAnalyzer:
         prompt = f"""
         Based on this educational content, identify the prerequisite knowledge a student should have:
 
-        {content_summary[:1000]}...
+        {content_summary}...
 
         List 3-6 prerequisite topics or skills that would be helpful before starting this course.
         Return as a JSON array of strings. Respond with ONLY the JSON array, no other text.
@@ -310,13 +991,13 @@ class ContentAnalyzer:
         try:
             response = self.model.generate_content(
                 prompt,
-                generation_config=self.generation_config
+                generation_config=self.list_config
             )
             
             content = response.text.strip()
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
+            json_text = extract_json(content, '[', ']')
+            if json_text:
+                return _json_loads(json_text)
             else:
                 # Extract from text
                 prerequisites = []
@@ -330,7 +1011,7 @@ class ContentAnalyzer:
                 
         except Exception as e:
             logger.error(f"Error identifying prerequisites: {e}")
-            return ["Basic understanding of the subject area"]
+            return list(DEFAULT_PREREQUISITES)
     
     def _suggest_learning_path(self, video_analyses: List[Dict], structure_analysis: Dict) -> List[Dict]:
         """Suggest optimal learning path through the content.
@@ -345,10 +1026,22 @@ class ContentAnalyzer:
         if not video_analyses:
             return []
         
-        # Group videos by difficulty and themes
-        beginner_videos = [v for v in video_analyses if v.get('difficulty') == 'beginner']
-        intermediate_videos = [v for v in video_analyses if v.get('difficulty') == 'intermediate']
-        advanced_videos = [v for v in video_analyses if v.get('difficulty') == 'advanced']
+        # Group videos by difficulty in one pass (unclassified videos are left out),
+        # noting whether they're already in playlist order for the fallback below
+        buckets = {'beginner': [], 'intermediate': [], 'advanced': []}
+        in_order = True
+        last_position = None
+        for v in video_analyses:
+            bucket = buckets.get(v.get('difficulty'))
+            if bucket is not None:
+                bucket.append(v)
+            position = v.get('position', 0)
+            if last_position is not None and position < last_position:
+                in_order = False
+            last_position = position
+        beginner_videos = buckets['beginner']
+        intermediate_videos = buckets['intermediate']
+        advanced_videos = buckets['advanced']
         
         learning_path = []
         
@@ -381,7 +1074,7 @@ class ContentAnalyzer:
         
         # If no difficulty classification, group by position
         if not learning_path:
-            all_videos = sorted(video_analyses, key=lambda x: x.get('position', 0))
+            all_videos = video_analyses if in_order else sorted(video_analyses, key=lambda x: x.get('position', 0))
             chunk_size = max(1, len(all_videos) // 3)
             
             for i in range(0, len(all_videos), chunk_size):
@@ -404,14 +1097,12 @@ class ContentAnalyzer:
         Returns:
             Difficulty level (beginner, intermediate, advanced)
         """
-        # Simple heuristic based on content complexity indicators
-        advanced_indicators = ['advanced', 'complex', 'sophisticated', 'expert', 'master']
-        beginner_indicators = ['introduction', 'basic', 'fundamental', 'getting started', 'beginner']
-        
-        content_lower = content_summary.lower()
+        # Simple heuristic based on content complexity indicators: the score is the
+        # number of distinct indicators present, found in one pass over the summary
+        found = set(_DIFFICULTY_INDICATOR_RE.findall(content_summary.lower()))
         
-        advanced_score = sum(1 for indicator in advanced_indicators if indicator in content_lower)
-        beginner_score = sum(1 for indicator in beginner_indicators if indicator in content_lower)
+        advanced_score = len(found.intersection(_ADVANCED_INDICATORS))
+        beginner_score = len(found.intersection(_BEGINNER_INDICATORS))
         
         if advanced_score > beginner_score:
             return 'advanced'
@@ -435,14 +1126,13 @@ class ContentAnalyzer:
             # Parse duration if available
             duration = video.get('duration', '')
             if duration:
-                # Simple parsing for PT format
-                minutes = 0
-                if 'M' in duration:
-                    try:
-                        minutes = int(duration.split('M')[0].split('T')[-1])
-                    except:
-                        minutes = 5  # Default estimate
-                total_minutes += minutes
+                # ISO 8601 PT format, e.g. PT1H4M13S (seconds round to the nearest minute)
+                match = _ISO_DURATION_RE.match(duration)
+                if match:
+                    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+                    total_minutes += hours * 60 + minutes + (seconds >= 30)
+                else:
+                    total_minutes += 5  # Default estimate
         
         # Add study time (assume 2x video time for notes, practice, etc.)
         total_study_minutes = total_minutes * 2
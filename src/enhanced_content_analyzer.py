@@ -5,67 +5,254 @@ with modules, lessons, quizzes, and assignments in the specified JSON format.
 """
 
 import os
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 import json
 import re
 from datetime import datetime, timedelta
+import threading
 import uuid
 
 import google.generativeai as genai
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from .utils import extract_json
+
+# Logging is configured by the entry points (app.py, main.py)
 logger = logging.getLogger(__name__)
 
+# Models are shared by every analyzer with the same API key and model name
+_model_lock = threading.Lock()
+_models: Dict[Tuple[str, str], Any] = {}
+_configured_api_key: Optional[str] = None
+
+# Normalization for the course cache fingerprint
+_URL_RE = re.compile(r'https?://\S+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Static tails of the course prompts, built once at import; the prompt builders
+# only format the per-call head and append these
+_COURSE_INFO_SCHEMA = """
+
+        Generate a JSON object with the following structure:
+        {
+            "title": "Course title (clear and descriptive)",
+            "description": "Detailed course description (2-3 sentences)",
+            "category": "Course category (Programming, Business, Design, etc.)",
+            "level": "Difficulty level (Beginner, Intermediate, Advanced)",
+            "price": "Suggested price in USD (numeric value)",
+            "duration": "Course duration (e.g., '8 weeks')",
+            "instructor": "Course instructor name or 'AI Course Generator'",
+            "tags": ["array", "of", "relevant", "tags"],
+            "thumbnail": "Playlist thumbnail URL or placeholder",
+            "prerequisites": ["List of prerequisites"],
+            "learningObjectives": ["List of 4-6 learning objectives"],
+            "isPublished": true,
+            "estimatedHours": "Total estimated hours (numeric)"
+        }
+
+        Make it professional and comprehensive. Return ONLY the JSON object.
+        """
+
+_MODULE_SCHEMA = """
+        
+        The module number and the videos in the module are given at the end.
+        Create a JSON object with this structure, where N is the module number:
+        {
+            "id": "module-N",
+            "title": "Module title",
+            "description": "Module description",
+            "duration": "Estimated duration (e.g., '2 weeks')",
+            "order": N,
+            "lessons": [
+                // Generate 2-4 lessons per module, mixing video lessons with text/quiz/project lessons
+                {
+                    "id": "lesson-N-1",
+                    "title": "Lesson title",
+                    "description": "Lesson description",
+                    "type": "video", // video, text, quiz, or project
+                    "duration": "Duration in minutes",
+                    "order": 1,
+                    "content": {
+                        // For video lessons:
+                        "videoUrl": "YouTube URL",
+                        "videoId": "YouTube video ID",
+                        "videoSource": "youtube"
+                        
+                        // For text lessons:
+                        "textContent": "Brief text content",
+                        "markdownContent": "Detailed markdown content"
+                        
+                        // For quiz lessons:
+                        "questions": [array of question objects]
+                        
+                        // For project lessons:
+                        "projectDescription": "Project description",
+                        "deliverables": ["list of deliverables"],
+                        "resources": ["list of resources"]
+                    },
+                    "resources": [
+                        {
+                            "title": "Resource title",
+                            "type": "pdf|link|code",
+                            "url": "Resource URL",
+                            "description": "Resource description"
+                        }
+                    ]
+                }
+            ]
+        }
+        
+        Make lessons engaging and educational. Include at least one quiz per module.
+        """
+
+_FINAL_EXAM_SCHEMA = """
+            ],
+            "finalExam": {
+                "title": "Final exam title",
+                "description": "Exam description",
+                "timeLimit": "Time limit in minutes (90-180)",
+                "passingScore": "Passing score percentage (70-80)",
+                "questions": [
+                    {
+                        "id": "final-q1",
+                        "question": "Essay question text",
+                        "type": "essay",
+                        "points": "Point value (10-20)"
+                    },
+                    {
+                        "id": "final-q2",
+                        "question": "Multiple choice question",
+                        "type": "multiple-choice",
+                        "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                        "correctAnswer": 0,
+                        "points": "Point value (5-10)"
+                    }
+                ]
+            }
+        }
+        
+        Make each assignment practical and relevant to the content of the module in its moduleId.
+        The final exam covers all modules, with 3-5 questions mixing essay and multiple choice.
+        Return ONLY the JSON object.
+        """
+
+
+def _make_generation_config() -> Any:
+    """Build the generation config shared by all course generation requests."""
+    # Configure generation settings for consistent responses
+    settings = dict(temperature=0.7, top_p=0.9, top_k=40, max_output_tokens=4096)
+    try:
+        # JSON mode (google-generativeai >= 0.5) returns bare JSON that parses directly
+        return genai.types.GenerationConfig(response_mime_type="application/json", **settings)
+    except TypeError:
+        return genai.types.GenerationConfig(**settings)
+
+
+def _get_model(api_key: str, model: str) -> Any:
+    """Return the GenerativeModel for an API key and model name, creating it on first use.
+    
+    genai.configure is process-global, so it only runs when the API key changes.
+    
+    Args:
+        api_key: Google AI API key
+        model: Gemini model name
+        
+    Returns:
+        The shared GenerativeModel
+    """
+    global _configured_api_key
+    key = (hashlib.blake2b(api_key.encode('utf-8'), digest_size=16).hexdigest(), model)
+    with _model_lock:
+        if key not in _models:
+            if api_key != _configured_api_key:
+                genai.configure(api_key=api_key)
+                _configured_api_key = api_key
+            _models[key] = genai.GenerativeModel(model)
+        return _models[key]
+
 
 class EnhancedContentAnalyzer:
     """Handles comprehensive course generation using Google Gemini."""
     
-    def __init__(self, api_key: str, model: str = "gemini-1.5-flash"):
+    generation_config = _make_generation_config()
+    
+    def __init__(self, api_key: str, model: str = "gemini-1.5-flash", cache: Optional[Any] = None,
+                 cache_ttl: int = 7 * 24 * 3600):
         """Initialize Gemini client.
         
         Args:
             api_key: Google AI API key
             model: Gemini model to use
+            cache: Redis-compatible (get/setex) cache for generated courses, e.g. utils.SQLiteCache
+            cache_ttl: Seconds a cached course stays valid
         """
-        genai.configure(api_key=api_key)
         self.model_name = model
-        self.model = genai.GenerativeModel(model)
-        
-        # Configure generation settings for consistent responses
-        self.generation_config = genai.types.GenerationConfig(
-            temperature=0.7,
-            top_p=0.9,
-            top_k=40,
-            max_output_tokens=4096,
-        )
+        self.model = _get_model(api_key, model)
+        self.cache = cache
+        self.cache_ttl = cache_ttl
     
     def generate_comprehensive_course(self, playlist_data: Dict) -> Dict:
         """Generate complete course structure from playlist data.
         
+        Synchronous wrapper around generate_comprehensive_course_async.
+        
+        Args:
+            playlist_data: Complete playlist data from YouTubeExtractor
+            
+        Returns:
+            Complete course structure in the specified JSON format
+        """
+        return asyncio.run(self.generate_comprehensive_course_async(playlist_data))
+    
+    async def generate_comprehensive_course_async(self, playlist_data: Dict, max_concurrency: int = 5) -> Dict:
+        """Generate complete course structure from playlist data, with concurrent Gemini calls.
+        
+        All modules are generated in parallel once the course info is known, then the
+        assignments and the final exam are generated together in one request.
+        
         Args:
             playlist_data: Complete playlist data from YouTubeExtractor
+            max_concurrency: Maximum number of in-flight Gemini calls (keeps under the RPM limit)
             
         Returns:
             Complete course structure in the specified JSON format
         """
         logger.info("Generating comprehensive course structure...")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def limited(call):
+            async with semaphore:
+                return await call
         
         # Prepare content summary for analysis
         content_summary = self._prepare_content_summary(playlist_data)
         
+        # The same playlist content always yields an equivalent course, so reuse it
+        cache_key = self._course_cache_key(playlist_data, content_summary)
+        cached = self._get_cached_course(cache_key)
+        if cached is not None:
+            logger.info("Using cached course structure")
+            return self._restamp_course(cached, datetime.now())
+        
+        # One timestamp for the whole course, so generatedAt and due dates agree
+        now = datetime.now()
+        
         # Generate course metadata
-        course_info = self._generate_course_info(playlist_data, content_summary)
+        course_info = await limited(self._generate_course_info_async(playlist_data, content_summary))
+        complete = course_info is not None
+        if course_info is None:
+            course_info = self._fallback_course_info(playlist_data)
         
         # Generate modules with lessons
-        modules = self._generate_modules(playlist_data, content_summary, course_info)
+        modules, modules_complete = await self._generate_modules_async(
+            playlist_data, content_summary, course_info, limited)
         
-        # Generate assignments
-        assignments = self._generate_assignments(modules, course_info)
-        
-        # Generate final exam
-        final_exam = self._generate_final_exam(course_info, modules)
+        # Generate assignments and the final exam with a single request
+        assignments, final_exam, assessments_complete = await limited(
+            self._generate_assignments_and_exam_async(modules, course_info, now))
+        complete = complete and modules_complete and assessments_complete
         
         # Create complete course structure
         course_structure = {
@@ -73,77 +260,139 @@ class EnhancedContentAnalyzer:
             "modules": modules,
             "assignments": assignments,
             "finalExam": final_exam,
-            "generatedAt": datetime.now().isoformat(),
+            "generatedAt": now.isoformat(),
             "agentVersion": "2.0",
             "confidence": 0.92,
             "suggestedImprovements": self._generate_improvements(course_info, modules)
         }
         
         logger.info(f"Generated course with {len(modules)} modules")
+        # Only cache courses Gemini generated in full; fallback parts are retried next time
+        if complete:
+            self._set_cached_course(cache_key, course_structure)
+        return course_structure
+    
+    def _restamp_course(self, course_structure: Dict, now: datetime) -> Dict:
+        """Date a cached course as if it were generated now: generatedAt and assignment due dates."""
+        course_structure['generatedAt'] = now.isoformat()
+        for i, assignment in enumerate(course_structure.get('assignments', [])):
+            assignment['dueDate'] = self._due_date(i, now)
         return course_structure
     
+    @staticmethod
+    def _due_date(i: int, now: datetime) -> str:
+        """Due date of the i-th (0-based) assignment: two weeks per module."""
+        return (now + timedelta(weeks=2*(i+1))).isoformat()
+    
+    def _course_cache_key(self, playlist_data: Dict, content_summary: str) -> str:
+        """Fingerprint the course inputs: the normalized content summary and the video IDs.
+        
+        Case, whitespace and URLs in the summary don't change the key; the video IDs are
+        included because the generated lessons link to them.
+        """
+        normalized = _WHITESPACE_RE.sub(' ', _URL_RE.sub('', content_summary.lower())).strip()
+        video_ids = ','.join(video.get('video_id', '') for video in playlist_data.get('videos', []))
+        digest = hashlib.blake2b(f"{self.model_name}|{normalized}|{video_ids}".encode(), digest_size=16).hexdigest()
+        return f"course:{digest}"
+    
+    def _get_cached_course(self, key: str) -> Optional[Dict]:
+        """Look up a generated course in the cache, if any."""
+        if self.cache is None:
+            return None
+        try:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Course cache lookup failed: {e}")
+        return None
+    
+    def _set_cached_course(self, key: str, course_structure: Dict) -> None:
+        """Store a generated course in the cache, if any."""
+        if self.cache is None:
+            return
+        try:
+            self.cache.setex(key, self.cache_ttl, json.dumps(course_structure, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"Course cache store failed: {e}")
+    
+    async def _generate_json_async(self, prompt: str) -> Optional[Dict]:
+        """Run _generate_json in a worker thread.
+        
+        The async Gemini client stays bound to the event loop it was first used on, and
+        generate_comprehensive_course runs a new loop per call, so requests go through
+        the loop-independent sync client instead.
+        
+        Args:
+            prompt: Prompt to send
+            
+        Returns:
+            Parsed JSON object, or None if the response contains none
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, self._generate_json, prompt)
+    
+    def _generate_json(self, prompt: str) -> Optional[Dict]:
+        """Stream a Gemini completion and extract the JSON object from it.
+        
+        Stops reading as soon as the object is balanced, so trailing text isn't waited for.
+        
+        Args:
+            prompt: Prompt to send
+            
+        Returns:
+            Parsed JSON object, or None if the response contains none
+        """
+        response = self.model.generate_content(
+            prompt,
+            generation_config=self.generation_config,
+            stream=True
+        )
+        
+        chunks = []
+        raw = None
+        for chunk in response:
+            chunks.append(chunk.text)
+            if '}' in chunk.text:
+                raw = extract_json("".join(chunks))
+                if raw is not None:
+                    break
+        
+        if raw is None:
+            return None
+        parsed = json.loads(raw)
+        return parsed if isinstance(parsed, dict) else None
+    
     def _prepare_content_summary(self, playlist_data: Dict) -> str:
         """Prepare content summary from playlist data."""
-        summary_parts = []
-        
         # Add playlist info
         playlist_info = playlist_data.get('playlist_info', {})
-        summary_parts.append(f"Playlist: {playlist_info.get('title', 'Unknown')}")
-        summary_parts.append(f"Channel: {playlist_info.get('channel_title', 'Unknown')}")
-        summary_parts.append(f"Description: {playlist_info.get('description', '')[:500]}")
-        summary_parts.append("")
+        summary_parts = [
+            f"Playlist: {playlist_info.get('title', 'Unknown')}",
+            f"Channel: {playlist_info.get('channel_title', 'Unknown')}",
+            f"Description: {playlist_info.get('description', '')[:500]}",
+            "",
+        ]
         
         # Add video summaries
-        for i, video in enumerate(playlist_data.get('videos', [])[:10]):  # Limit for context
-            summary_parts.append(f"Video {i+1}: {video.get('title', 'Unknown')}")
-            summary_parts.append(f"Description: {video.get('description', '')[:200]}")
-            if video.get('transcript'):
-                transcript_preview = video['transcript'][:300] + "..." if len(video['transcript']) > 300 else video['transcript']
-                summary_parts.append(f"Transcript preview: {transcript_preview}")
+        for i, video in enumerate(playlist_data.get('videos', [])[:10], 1):  # Limit for context
+            get = video.get
+            summary_parts.append(f"Video {i}: {get('title', 'Unknown')}")
+            summary_parts.append(f"Description: {get('description', '')[:200]}")
+            transcript = get('transcript')
+            if transcript:
+                preview = transcript[:300] + "..." if len(transcript) > 300 else transcript
+                summary_parts.append(f"Transcript preview: {preview}")
             summary_parts.append("")
         
         return "\n".join(summary_parts)
     
-    def _generate_course_info(self, playlist_data: Dict, content_summary: str) -> Dict:
-        """Generate comprehensive course information."""
+    async def _generate_course_info_async(self, playlist_data: Dict, content_summary: str) -> Optional[Dict]:
+        """Generate comprehensive course information, or None if Gemini gives no usable response."""
         playlist_info = playlist_data.get('playlist_info', {})
         
-        prompt = f"""
-        Based on this YouTube playlist content, generate comprehensive course information:
-
-        {content_summary}
-
-        Generate a JSON object with the following structure:
-        {{
-            "title": "Course title (clear and descriptive)",
-            "description": "Detailed course description (2-3 sentences)",
-            "category": "Course category (Programming, Business, Design, etc.)",
-            "level": "Difficulty level (Beginner, Intermediate, Advanced)",
-            "price": "Suggested price in USD (numeric value)",
-            "duration": "Course duration (e.g., '8 weeks')",
-            "instructor": "Course instructor name or 'AI Course Generator'",
-            "tags": ["array", "of", "relevant", "tags"],
-            "thumbnail": "Playlist thumbnail URL or placeholder",
-            "prerequisites": ["List of prerequisites"],
-            "learningObjectives": ["List of 4-6 learning objectives"],
-            "isPublished": true,
-            "estimatedHours": "Total estimated hours (numeric)"
-        }}
-
-        Make it professional and comprehensive. Return ONLY the JSON object.
-        """
-        
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                course_info = json.loads(json_match.group())
-                
+            course_info = await self._generate_json_async(self._course_info_prompt(content_summary))
+            if course_info:
                 # Ensure thumbnail URL
                 if not course_info.get('thumbnail') or course_info['thumbnail'] == 'placeholder':
                     course_info['thumbnail'] = playlist_info.get('thumbnail_url', 'https://via.placeholder.com/640x360?text=Course+Thumbnail')
@@ -153,7 +402,19 @@ class EnhancedContentAnalyzer:
         except Exception as e:
             logger.error(f"Error generating course info: {e}")
         
-        # Fallback course info
+        return None
+    
+    def _course_info_prompt(self, content_summary: str) -> str:
+        """Build the course information prompt."""
+        return f"""
+        Based on this YouTube playlist content, generate comprehensive course information:
+
+        {content_summary}""" + _COURSE_INFO_SCHEMA
+    
+    def _fallback_course_info(self, playlist_data: Dict) -> Dict:
+        """Course info used when Gemini doesn't return a usable response."""
+        playlist_info = playlist_data.get('playlist_info', {})
+        
         return {
             "title": playlist_info.get('title', 'Learning Course'),
             "description": "A comprehensive course based on curated YouTube content",
@@ -174,134 +435,117 @@ class EnhancedContentAnalyzer:
             "estimatedHours": len(playlist_data.get('videos', [])) * 0.5
         }
     
-    def _generate_modules(self, playlist_data: Dict, content_summary: str, course_info: Dict) -> List[Dict]:
-        """Generate course modules with lessons."""
+    async def _generate_modules_async(self, playlist_data: Dict, content_summary: str, course_info: Dict,
+                                      limited: Callable[[Awaitable], Awaitable]) -> Tuple[List[Dict], bool]:
+        """Generate course modules with lessons, all modules concurrently.
+        
+        Returns the modules and whether Gemini generated all of them (none fell back).
+        """
         videos = playlist_data.get('videos', [])
         total_videos = len(videos)
         
         # Determine number of modules (aim for 3-6 modules)
         num_modules = max(3, min(6, total_videos // 3))
-        videos_per_module = total_videos // num_modules
         
-        modules = []
+        # Built once; every module prompt starts with it
+        prompt_prefix = self._module_prompt_prefix(course_info)
+        
+        # Summarize every video once, then slice the summaries per module
+        video_summaries = [self._video_summary(video) for video in videos]
         
+        # Balanced split: the first `extra` modules take one more video than the rest
+        base_size, extra = divmod(total_videos, num_modules)
+        module_videos = []
+        calls = []
+        end_idx = 0
         for module_idx in range(num_modules):
-            start_idx = module_idx * videos_per_module
-            end_idx = start_idx + videos_per_module if module_idx < num_modules - 1 else total_videos
-            module_videos = videos[start_idx:end_idx]
+            start_idx = end_idx
+            end_idx = start_idx + base_size + (module_idx < extra)
+            module_videos.append(videos[start_idx:end_idx])
             
-            module = self._generate_single_module(
+            calls.append(limited(self._generate_single_module_async(
                 module_idx + 1, 
-                module_videos, 
-                course_info,
-                content_summary
-            )
-            modules.append(module)
-        
-        return modules
+                module_videos[-1], 
+                video_summaries[start_idx:end_idx], 
+                prompt_prefix
+            )))
+        
+        generated = await asyncio.gather(*calls)
+        modules = [
+            module or self._fallback_module(module_number, group)
+            for module_number, (module, group) in enumerate(zip(generated, module_videos), 1)
+        ]
+        return modules, all(generated)
     
-    def _generate_single_module(self, module_number: int, videos: List[Dict], course_info: Dict, content_summary: str) -> Dict:
-        """Generate a single module with lessons."""
-        # Prepare video summaries for this module
-        video_summaries = []
-        for video in videos:
-            video_summaries.append({
-                'title': video.get('title', ''),
-                'description': video.get('description', '')[:200],
-                'url': video.get('url', ''),
-                'video_id': video.get('video_id', ''),
-                'duration': video.get('duration', ''),
-                'transcript_preview': video.get('transcript', '')[:300] if video.get('transcript') else None
-            })
-        
-        prompt = f"""
-        Generate a comprehensive learning module for this course:
-        Course: {course_info['title']}
-        Module Number: {module_number}
-        
-        Videos in this module:
-        {json.dumps(video_summaries, indent=2)}
-        
-        Create a JSON object with this structure:
-        {{
-            "id": "module-{module_number}",
-            "title": "Module title",
-            "description": "Module description",
-            "duration": "Estimated duration (e.g., '2 weeks')",
-            "order": {module_number},
-            "lessons": [
-                // Generate 2-4 lessons per module, mixing video lessons with text/quiz/project lessons
-                {{
-                    "id": "lesson-{module_number}-1",
-                    "title": "Lesson title",
-                    "description": "Lesson description",
-                    "type": "video", // video, text, quiz, or project
-                    "duration": "Duration in minutes",
-                    "order": 1,
-                    "content": {{
-                        // For video lessons:
-                        "videoUrl": "YouTube URL",
-                        "videoId": "YouTube video ID",
-                        "videoSource": "youtube"
-                        
-                        // For text lessons:
-                        "textContent": "Brief text content",
-                        "markdownContent": "Detailed markdown content"
-                        
-                        // For quiz lessons:
-                        "questions": [array of question objects]
-                        
-                        // For project lessons:
-                        "projectDescription": "Project description",
-                        "deliverables": ["list of deliverables"],
-                        "resources": ["list of resources"]
-                    }},
-                    "resources": [
-                        {{
-                            "title": "Resource title",
-                            "type": "pdf|link|code",
-                            "url": "Resource URL",
-                            "description": "Resource description"
-                        }}
-                    ]
-                }}
-            ]
-        }}
-        
-        Make lessons engaging and educational. Include at least one quiz per module.
-        Return ONLY the JSON object.
-        """
-        
+    async def _generate_single_module_async(self, module_number: int, videos: List[Dict],
+                                            video_summaries: List[Dict], prompt_prefix: str) -> Optional[Dict]:
+        """Generate a single module with lessons, or None if Gemini gives no usable response."""
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                module_data = json.loads(json_match.group())
+            module_data = await self._generate_json_async(
+                self._module_prompt(prompt_prefix, module_number, video_summaries))
+            if module_data:
+                # The prompt schema uses N placeholders, so set the real numbering here
+                module_data['id'] = f"module-{module_number}"
+                module_data['order'] = module_number
                 
-                # Ensure video lessons use actual video data
-                for lesson in module_data.get('lessons', []):
-                    if lesson.get('type') == 'video' and videos:
-                        # Find matching video or use first available
-                        video = videos[0] if videos else None
+                # Ensure video lessons use actual video data, in playlist order
+                unused_videos = iter(videos)
+                for lesson_number, lesson in enumerate(module_data.get('lessons', []), 1):
+                    lesson['id'] = f"lesson-{module_number}-{lesson_number}"
+                    if lesson.get('type') == 'video':
+                        video = next(unused_videos, None)
                         if video:
                             lesson['content'] = {
                                 'videoUrl': video.get('url', ''),
                                 'videoId': video.get('video_id', ''),
                                 'videoSource': 'youtube'
                             }
-                            videos.pop(0)  # Remove used video
                 
                 return module_data
             
         except Exception as e:
             logger.error(f"Error generating module {module_number}: {e}")
         
-        # Fallback module
+        return None
+    
+    def _module_prompt_prefix(self, course_info: Dict) -> str:
+        """Build the part of the module prompt shared by every module of the course.
+        
+        It comes first and is byte-identical across the module calls, so Gemini's
+        implicit prompt cache can reuse it; only the module suffix varies.
+        """
+        return f"""
+        Generate a comprehensive learning module for this course:
+        Course: {course_info['title']}
+        Course description: {course_info.get('description', '')}""" + _MODULE_SCHEMA
+    
+    @staticmethod
+    def _video_summary(video: Dict) -> Dict:
+        """Summarize a video for the module prompt."""
+        get = video.get
+        transcript = get('transcript')
+        return {
+            'title': get('title', ''),
+            'description': get('description', '')[:200],
+            'url': get('url', ''),
+            'video_id': get('video_id', ''),
+            'duration': get('duration', ''),
+            'transcript_preview': transcript[:300] if transcript else None
+        }
+    
+    def _module_prompt(self, prefix: str, module_number: int, video_summaries: List[Dict]) -> str:
+        """Build the prompt for a single module: the shared prefix, then this module's details."""
+        return prefix + f"""
+        Module Number: {module_number}
+        
+        Videos in this module:
+        {json.dumps(video_summaries, indent=2)}
+        
+        Return ONLY the JSON object.
+        """
+    
+    def _fallback_module(self, module_number: int, videos: List[Dict]) -> Dict:
+        """Module used when Gemini doesn't return a usable response."""
         lessons = []
         for i, video in enumerate(videos[:3]):  # Max 3 lessons per module
             lessons.append({
@@ -350,118 +594,84 @@ class EnhancedContentAnalyzer:
             "lessons": lessons
         }
     
-    def _generate_assignments(self, modules: List[Dict], course_info: Dict) -> List[Dict]:
-        """Generate course assignments."""
-        assignments = []
+    async def _generate_assignments_and_exam_async(self, modules: List[Dict], course_info: Dict,
+                                                   now: datetime) -> Tuple[List[Dict], Dict, bool]:
+        """Generate the assignments for the first 3 modules and the final exam with one Gemini call.
         
-        for i, module in enumerate(modules[:3]):  # Generate assignments for first 3 modules
-            assignment_id = f"assignment-{i+1}"
-            
-            prompt = f"""
-            Generate an assignment for this course module:
-            Course: {course_info['title']}
-            Module: {module['title']} - {module['description']}
-            
-            Create a JSON object:
-            {{
-                "id": "{assignment_id}",
-                "title": "Assignment title",
-                "description": "Detailed assignment description (2-3 sentences)",
-                "moduleId": "{module['id']}",
-                "dueDate": "Due date (ISO format, 2 weeks from now)",
-                "points": "Point value (50-150)",
-                "submissionType": "file"
-            }}
-            
-            Make it practical and relevant to the module content.
-            Return ONLY the JSON object.
-            """
-            
-            try:
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=self.generation_config
-                )
-                
-                content = response.text.strip()
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    assignment = json.loads(json_match.group())
-                    # Ensure due date is set
-                    due_date = (datetime.now() + timedelta(weeks=2*(i+1))).isoformat()
-                    assignment['dueDate'] = due_date
-                    assignments.append(assignment)
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"Error generating assignment {i+1}: {e}")
-            
-            # Fallback assignment
-            assignments.append({
-                "id": assignment_id,
-                "title": f"Module {i+1} Assignment",
-                "description": f"Complete practical exercises based on {module['title']} content.",
-                "moduleId": module['id'],
-                "dueDate": (datetime.now() + timedelta(weeks=2*(i+1))).isoformat(),
-                "points": 100,
-                "submissionType": "file"
-            })
+        Any assignment (or the exam) missing from the response falls back individually.
+        Returns the assignments, the final exam and whether none of them fell back.
+        """
+        assigned_modules = modules[:3]
+        result = None
+        try:
+            result = await self._generate_json_async(self._assignments_and_exam_prompt(modules, course_info))
+        except Exception as e:
+            logger.error(f"Error generating assignments and final exam: {e}")
+        result = result or {}
         
-        return assignments
+        generated = result.get('assignments')
+        if not isinstance(generated, list):
+            generated = []
+        assignments = []
+        complete = True
+        for i, module in enumerate(assigned_modules):
+            assignment = generated[i] if i < len(generated) else None
+            if isinstance(assignment, dict) and assignment:
+                # Ensure due date is set
+                assignment['dueDate'] = self._due_date(i, now)
+                assignments.append(assignment)
+            else:
+                assignments.append(self._fallback_assignment(i, module, now))
+                complete = False
+        
+        final_exam = result.get('finalExam')
+        if not (isinstance(final_exam, dict) and final_exam):
+            final_exam = self._fallback_final_exam(course_info)
+            complete = False
+        
+        return assignments, final_exam, complete
     
-    def _generate_final_exam(self, course_info: Dict, modules: List[Dict]) -> Dict:
-        """Generate final exam."""
-        prompt = f"""
-        Generate a comprehensive final exam for this course:
+    def _assignments_and_exam_prompt(self, modules: List[Dict], course_info: Dict) -> str:
+        """Build the combined prompt for the first 3 modules' assignments and the final exam."""
+        assignment_specs = ",\n".join(
+            f"""                {{
+                    "id": "assignment-{i+1}",
+                    "title": "Assignment title",
+                    "description": "Detailed assignment description (2-3 sentences)",
+                    "moduleId": "{module['id']}",
+                    "dueDate": "Due date (ISO format)",
+                    "points": "Point value (50-150)",
+                    "submissionType": "file"
+                }}"""
+            for i, module in enumerate(modules[:3])
+        )
+        return f"""
+        Generate the assignments and the final exam for this course:
         Course: {course_info['title']}
         Description: {course_info['description']}
         
         Modules covered:
-        {json.dumps([{"title": m["title"], "description": m["description"]} for m in modules], indent=2)}
+        {json.dumps([{"id": m["id"], "title": m["title"], "description": m["description"]} for m in modules], indent=2)}
         
         Create a JSON object:
         {{
-            "title": "Final exam title",
-            "description": "Exam description",
-            "timeLimit": "Time limit in minutes (90-180)",
-            "passingScore": "Passing score percentage (70-80)",
-            "questions": [
-                {{
-                    "id": "final-q1",
-                    "question": "Essay question text",
-                    "type": "essay",
-                    "points": "Point value (10-20)"
-                }},
-                {{
-                    "id": "final-q2",
-                    "question": "Multiple choice question",
-                    "type": "multiple-choice",
-                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                    "correctAnswer": 0,
-                    "points": "Point value (5-10)"
-                }}
-            ]
-        }}
-        
-        Include 3-5 questions mixing essay and multiple choice.
-        Return ONLY the JSON object.
-        """
-        
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            content = response.text.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-                
-        except Exception as e:
-            logger.error(f"Error generating final exam: {e}")
-        
-        # Fallback final exam
+            "assignments": [
+{assignment_specs}""" + _FINAL_EXAM_SCHEMA
+    
+    def _fallback_assignment(self, i: int, module: Dict, now: datetime) -> Dict:
+        """Assignment used when Gemini doesn't return a usable one for the i-th (0-based) module."""
+        return {
+            "id": f"assignment-{i+1}",
+            "title": f"Module {i+1} Assignment",
+            "description": f"Complete practical exercises based on {module['title']} content.",
+            "moduleId": module['id'],
+            "dueDate": self._due_date(i, now),
+            "points": 100,
+            "submissionType": "file"
+        }
+    
+    def _fallback_final_exam(self, course_info: Dict) -> Dict:
+        """Final exam used when Gemini doesn't return a usable response."""
         return {
             "title": f"{course_info['title']} Final Exam",
             "description": "Comprehensive exam covering all course topics and modules.",
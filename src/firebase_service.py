@@ -18,6 +18,9 @@ from google.cloud.firestore_v1.base_query import FieldFilter
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Firestore rejects write batches with more than 500 operations
+MAX_BATCH_WRITES = 500
+
 
 class FirebaseService:
     """Handles Firebase Firestore operations for playlist data management."""
@@ -86,44 +89,8 @@ class FirebaseService:
             return None
         
         try:
-            playlist_info = playlist_data['playlist_info']
-            playlist_id = playlist_info['id']
-            
-            # Prepare playlist document
-            playlist_doc = {
-                'playlist_id': playlist_id,
-                'title': playlist_info['title'],
-                'description': playlist_info['description'],
-                'thumbnail_url': playlist_info['thumbnail'],
-                'channel_title': playlist_info['channel_title'],
-                'channel_id': playlist_info['channel_id'],
-                'video_count': len(playlist_data['videos']),
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow(),
-                'url': f"https://www.youtube.com/playlist?list={playlist_id}"
-            }
-            
-            # Store playlist document
-            doc_ref = self.db.collection('playlists').document(playlist_id)
-            doc_ref.set(playlist_doc)
-            
-            # Store videos subcollection
-            videos_ref = doc_ref.collection('videos')
-            for video in playlist_data['videos']:
-                video_doc = {
-                    'video_id': video['video_id'],
-                    'title': video['title'],
-                    'description': video.get('description', ''),
-                    'thumbnail_url': video.get('thumbnail', ''),
-                    'duration': video.get('duration', ''),
-                    'published_at': video.get('published_at', ''),
-                    'position': video.get('position', 0),
-                    'url': f"https://www.youtube.com/watch?v={video['video_id']}",
-                    'has_transcript': bool(video.get('transcript')),
-                    'transcript_length': len(video.get('transcript', '')),
-                    'added_at': datetime.utcnow()
-                }
-                videos_ref.document(video['video_id']).set(video_doc)
+            playlist_id = playlist_data['playlist_info']['id']
+            self._commit_in_batches(self._playlist_writes(playlist_data))
             
             logger.info(f"Stored playlist {playlist_id} with {len(playlist_data['videos'])} videos")
             return playlist_id
@@ -132,6 +99,85 @@ class FirebaseService:
             logger.error(f"Error storing playlist: {e}")
             return None
     
+    def store_playlist_and_analysis(self, playlist_data: Dict, playlist_id: str, analysis_data: Dict) -> bool:
+        """Store playlist data and its analysis results with batched writes.
+        
+        Args:
+            playlist_data: Complete playlist data from YouTubeExtractor
+            playlist_id: YouTube playlist ID
+            analysis_data: Analysis results from ContentAnalyzer
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_connected():
+            logger.warning("Firebase not connected, cannot store playlist and analysis")
+            return False
+        
+        try:
+            writes = self._playlist_writes(playlist_data)
+            writes.append((self.db.collection('analyses').document(playlist_id),
+                           self._analysis_doc(playlist_id, analysis_data)))
+            self._commit_in_batches(writes)
+            
+            logger.info(f"Stored playlist {playlist_id} with {len(playlist_data['videos'])} videos and its analysis")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error storing playlist and analysis: {e}")
+            return False
+    
+    def _playlist_writes(self, playlist_data: Dict) -> List[tuple]:
+        """Build the (document reference, data) writes for a playlist and its videos subcollection."""
+        playlist_info = playlist_data['playlist_info']
+        playlist_id = playlist_info['id']
+        
+        # Prepare playlist document
+        playlist_doc = {
+            'playlist_id': playlist_id,
+            'title': playlist_info['title'],
+            'description': playlist_info['description'],
+            'thumbnail_url': playlist_info['thumbnail'],
+            'channel_title': playlist_info['channel_title'],
+            'channel_id': playlist_info['channel_id'],
+            'video_count': len(playlist_data['videos']),
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow(),
+            'url': f"https://www.youtube.com/playlist?list={playlist_id}"
+        }
+        
+        doc_ref = self.db.collection('playlists').document(playlist_id)
+        writes = [(doc_ref, playlist_doc)]
+        
+        # Videos subcollection
+        videos_ref = doc_ref.collection('videos')
+        for video in playlist_data['videos']:
+            video_doc = {
+                'video_id': video['video_id'],
+                'title': video['title'],
+                'description': video.get('description', ''),
+                'thumbnail_url': video.get('thumbnail', ''),
+                'duration': video.get('duration', ''),
+                'published_at': video.get('published_at', ''),
+                'position': video.get('position', 0),
+                'url': f"https://www.youtube.com/watch?v={video['video_id']}",
+                'has_transcript': bool(video.get('transcript')),
+                # Transcripts are capped when fetched, so prefer the recorded full length
+                'transcript_length': video.get('transcript_length', len(video.get('transcript') or '')),
+                'added_at': datetime.utcnow()
+            }
+            writes.append((videos_ref.document(video['video_id']), video_doc))
+        
+        return writes
+    
+    def _commit_in_batches(self, writes: List[tuple]) -> None:
+        """Commit document writes with as few batched round trips as Firestore allows."""
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for doc_ref, data in writes[start:start + MAX_BATCH_WRITES]:
+                batch.set(doc_ref, data)
+            batch.commit()
+    
     def get_playlist(self, playlist_id: str) -> Optional[Dict]:
         """Retrieve playlist data from Firestore.
         
@@ -189,23 +235,9 @@ class FirebaseService:
             return False
         
         try:
-            # Prepare analysis document
-            analysis_doc = {
-                'playlist_id': playlist_id,
-                'content_summary': analysis_data.get('content_summary', ''),
-                'structure_analysis': analysis_data.get('structure_analysis', {}),
-                'learning_objectives': analysis_data.get('learning_objectives', []),
-                'prerequisites': analysis_data.get('prerequisites', []),
-                'learning_path': analysis_data.get('learning_path', []),
-                'difficulty_level': analysis_data.get('difficulty_level', 'intermediate'),
-                'estimated_completion_time': analysis_data.get('estimated_completion_time', 0),
-                'video_analyses': analysis_data.get('video_analyses', []),
-                'analyzed_at': datetime.utcnow()
-            }
-            
             # Store analysis document
             doc_ref = self.db.collection('analyses').document(playlist_id)
-            doc_ref.set(analysis_doc)
+            doc_ref.set(self._analysis_doc(playlist_id, analysis_data))
             
             logger.info(f"Stored analysis results for playlist {playlist_id}")
             return True
@@ -214,6 +246,21 @@ class FirebaseService:
             logger.error(f"Error storing analysis results: {e}")
             return False
     
+    def _analysis_doc(self, playlist_id: str, analysis_data: Dict) -> Dict:
+        """Prepare the analysis document stored for a playlist."""
+        return {
+            'playlist_id': playlist_id,
+            'content_summary': analysis_data.get('content_summary', ''),
+            'structure_analysis': analysis_data.get('structure_analysis', {}),
+            'learning_objectives': analysis_data.get('learning_objectives', []),
+            'prerequisites': analysis_data.get('prerequisites', []),
+            'learning_path': analysis_data.get('learning_path', []),
+            'difficulty_level': analysis_data.get('difficulty_level', 'intermediate'),
+            'estimated_completion_time': analysis_data.get('estimated_completion_time', 0),
+            'video_analyses': analysis_data.get('video_analyses', []),
+            'analyzed_at': datetime.utcnow()
+        }
+    
     def get_analysis_results(self, playlist_id: str) -> Optional[Dict]:
         """Retrieve AI analysis results from Firestore.
         
@@ -243,6 +290,48 @@ class FirebaseService:
             logger.error(f"Error retrieving analysis results: {e}")
             return None
     
+    def get_cached_video_analysis(self, key: str) -> Optional[Dict]:
+        """Retrieve a cached per-video (or structure) LLM analysis.
+        
+        Args:
+            key: Content hash the analysis was cached under
+            
+        Returns:
+            Cached analysis if found, None otherwise
+        """
+        if not self.is_connected():
+            return None
+        
+        try:
+            doc = self.db.collection('analysis_cache').document(key).get()
+            return doc.to_dict().get('analysis') if doc.exists else None
+        except Exception as e:
+            logger.error(f"Error retrieving cached analysis: {e}")
+            return None
+    
+    def cache_video_analysis(self, key: str, analysis: Dict) -> bool:
+        """Cache a per-video (or structure) LLM analysis.
+        
+        Args:
+            key: Content hash to cache the analysis under
+            analysis: Analysis results
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_connected():
+            return False
+        
+        try:
+            self.db.collection('analysis_cache').document(key).set({
+                'analysis': analysis,
+                'cached_at': datetime.utcnow()
+            })
+            return True
+        except Exception as e:
+            logger.error(f"Error caching analysis: {e}")
+            return False
+    
     def list_playlists(self, limit: int = 50) -> List[Dict]:
         """List all stored playlists.
         
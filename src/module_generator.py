@@ -15,6 +15,9 @@ import markdown
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Output files are encoded up front and written through a 1 MiB buffer
+WRITE_BUFFER_SIZE = 1024 * 1024
+
 
 class ModuleGenerator:
     """Generates structured learning modules from analyzed content."""
@@ -531,19 +534,19 @@ class ModuleGenerator:
         """
         # Save JSON data
         json_file = os.path.join(self.output_dir, 'course_data.json')
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(course_package, f, indent=2, ensure_ascii=False)
+        with open(json_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(json.dumps(course_package, indent=2, ensure_ascii=False))
         
         # Generate HTML version
         html_file = os.path.join(self.output_dir, 'course_guide.html')
         html_content = self._generate_html_course(course_package)
-        with open(html_file, 'w', encoding='utf-8') as f:
+        with open(html_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
             f.write(html_content)
         
         # Generate Markdown version
         md_file = os.path.join(self.output_dir, 'course_guide.md')
         md_content = self._generate_markdown_course(course_package)
-        with open(md_file, 'w', encoding='utf-8') as f:
+        with open(md_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
             f.write(md_content)
         
         logger.info(f"Course package saved to {self.output_dir}")
@@ -5,15 +5,22 @@ Common utility functions used across the application.
 
 import os
 import re
+import time
 import logging
-from typing import Dict, List, Optional, Any
-from urllib.parse import urlparse
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Any, Union
 import json
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Whole-URL check for YouTube playlist links, capturing the playlist ID
+_YT_PLAYLIST_URL_RE = re.compile(
+    r'^https?://(?:[\w-]+\.)*(?:youtube\.com|youtu\.be)/.*?[?&]list=([\w-]+)', re.IGNORECASE
+)
+
 
 def validate_youtube_url(url: str) -> bool:
     """Validate if a URL is a valid YouTube playlist URL.
@@ -24,20 +31,49 @@ def validate_youtube_url(url: str) -> bool:
     Returns:
         True if valid YouTube playlist URL, False otherwise
     """
-    try:
-        parsed = urlparse(url)
-        
-        # Check if it's a YouTube domain
-        if 'youtube.com' not in parsed.netloc and 'youtu.be' not in parsed.netloc:
-            return False
-        
-        # Check if it contains a playlist parameter
-        if 'list=' in url:
-            return True
+    # A single regex match, since the web UI validates as the user types
+    return isinstance(url, str) and _YT_PLAYLIST_URL_RE.match(url) is not None
+
+
+def extract_json(text: str, open_char: str = '{', close_char: str = '}') -> Optional[str]:
+    """Return the first balanced JSON object (or array) in a model response.
+    
+    Walks the text once tracking nesting depth, skipping brackets inside string
+    literals, so malformed output can't trigger regex backtracking.
+    
+    Args:
+        text: Model response text
+        open_char: Opening bracket, '{' for objects or '[' for arrays
+        close_char: Matching closing bracket
         
-        return False
-    except Exception:
-        return False
+    Returns:
+        The balanced span, or None if there isn't one
+    """
+    start = text.find(open_char)
+    if start < 0:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == open_char:
+            depth += 1
+        elif char == close_char:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
 
 
 def clean_text(text: str) -> str:
@@ -156,8 +192,9 @@ def save_json(data: Dict, filepath: str, indent: int = 2) -> None:
     """
     try:
         ensure_directory(os.path.dirname(filepath))
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=False)
+        # Encode once and write through a large buffer instead of json.dump's many small writes
+        with open(filepath, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+            f.write(json.dumps(data, indent=indent, ensure_ascii=False))
     except Exception as e:
         logger.error(f"Could not save JSON to {filepath}: {e}")
         raise
@@ -401,3 +438,52 @@ class ProgressTracker:
             True if complete, False otherwise
         """
         return self.current >= self.total
+
+
+class SQLiteCache:
+    """Minimal Redis-compatible (get/setex) cache persisted in a local SQLite file."""
+    
+    def __init__(self, path: str = ".llm_cache.sqlite3"):
+        """Open (or create) the cache database, dropping expired entries.
+        
+        Args:
+            path: Path to the SQLite file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # get() already ignores expired rows; purging them here keeps the file from growing
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+    
+    def get(self, key: str) -> Optional[Union[str, bytes]]:
+        """Get a cached value.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Stored value, or None if missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def setex(self, key: str, ttl: int, value: Union[str, bytes]) -> None:
+        """Store a value with an expiry.
+        
+        Args:
+            key: Cache key
+            ttl: Time to live in seconds
+            value: Value to store
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
@@ -7,32 +7,67 @@ video metadata, and transcripts.
 import os
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+import contextlib
+import queue
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 
+import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.formatters import TextFormatter
 import requests
 
+# Lets transcript lookups run on a shared pooled session instead of a new one per video
+try:
+    from youtube_transcript_api._transcripts import TranscriptListFetcher
+except ImportError:
+    TranscriptListFetcher = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transcripts are only ever previewed (the analyzers read at most the first 2000
+# characters), so keep just the head of each one instead of the whole text
+MAX_TRANSCRIPT_CHARS = 8192
+
 
 class YouTubeExtractor:
     """Handles YouTube API operations and data extraction."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None):
         """Initialize YouTube API client.
         
         Args:
             api_key: YouTube Data API key
+            session: Shared requests session (connection pool) for transcript lookups
         """
         self.api_key = api_key
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = build('youtube', 'v3', developerKey=api_key, cache_discovery=False)
+        self.session = session or requests.Session()
         self.formatter = TextFormatter()
+        # Idle Http clients, most recently used first
+        self._http_pool: "queue.LifoQueue[httplib2.Http]" = queue.LifoQueue()
+    
+    @contextlib.contextmanager
+    def _pooled_http(self) -> Iterator[httplib2.Http]:
+        """Borrow an Http client for one API call (httplib2 is not thread-safe).
+        
+        Clients come from build_http, so they keep its socket timeout and redirect
+        handling, and go back to the pool afterwards, so their keep-alive connections
+        are reused across web requests rather than living for a single thread.
+        """
+        try:
+            http = self._http_pool.get_nowait()
+        except queue.Empty:
+            http = build_http()
+        try:
+            yield http
+        finally:
+            self._http_pool.put(http)
     
     def extract_playlist_id(self, url: str) -> Optional[str]:
         """Extract playlist ID from YouTube URL.
@@ -71,10 +106,11 @@ class YouTubeExtractor:
             Dictionary containing playlist metadata
         """
         try:
-            response = self.youtube.playlists().list(
-                part='snippet,contentDetails',
-                id=playlist_id
-            ).execute()
+            with self._pooled_http() as http:
+                response = self.youtube.playlists().list(
+                    part='snippet,contentDetails',
+                    id=playlist_id
+                ).execute(http=http)
             
             if not response['items']:
                 raise ValueError(f"Playlist {playlist_id} not found")
@@ -113,19 +149,23 @@ class YouTubeExtractor:
         
         try:
             while len(videos) < max_results:
-                response = self.youtube.playlistItems().list(
-                    part='snippet,contentDetails',
-                    playlistId=playlist_id,
-                    maxResults=min(50, max_results - len(videos)),
-                    pageToken=next_page_token
-                ).execute()
+                with self._pooled_http() as http:
+                    response = self.youtube.playlistItems().list(
+                        part='snippet,contentDetails',
+                        playlistId=playlist_id,
+                        maxResults=min(50, max_results - len(videos)),
+                        pageToken=next_page_token
+                    ).execute(http=http)
+                
+                # Get additional video details for the whole page in one request
+                page_details = self._get_videos_details(
+                    [item['snippet']['resourceId']['videoId'] for item in response['items']]
+                )
                 
                 for item in response['items']:
                     snippet = item['snippet']
                     video_id = snippet['resourceId']['videoId']
-                    
-                    # Get additional video details
-                    video_details = self._get_video_details(video_id)
+                    video_details = page_details.get(video_id, {})
                     
                     video_info = {
                         'video_id': video_id,
@@ -154,6 +194,41 @@ class YouTubeExtractor:
             logger.error(f"Error getting playlist videos: {e}")
             raise
     
+    def _get_videos_details(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Get details for up to 50 videos with a single videos.list request.
+        
+        Args:
+            video_ids: YouTube video IDs (at most 50, one playlistItems page)
+            
+        Returns:
+            Dictionary mapping video ID to its details
+        """
+        if not video_ids:
+            return {}
+        
+        try:
+            with self._pooled_http() as http:
+                response = self.youtube.videos().list(
+                    part='contentDetails,statistics',
+                    id=','.join(video_ids),
+                    maxResults=50
+                ).execute(http=http)
+            
+            details = {}
+            for video in response['items']:
+                content_details = video.get('contentDetails', {})
+                statistics = video.get('statistics', {})
+                details[video['id']] = {
+                    'duration': content_details.get('duration', ''),
+                    'view_count': int(statistics.get('viewCount', 0)),
+                    'like_count': int(statistics.get('likeCount', 0)),
+                    'comment_count': int(statistics.get('commentCount', 0))
+                }
+            return details
+        except Exception as e:
+            logger.warning(f"Could not get video details for {len(video_ids)} videos: {e}")
+            return {}
+    
     def _get_video_details(self, video_id: str) -> Dict:
         """Get additional video details like duration and statistics.
         
@@ -164,10 +239,11 @@ class YouTubeExtractor:
             Dictionary with video details
         """
         try:
-            response = self.youtube.videos().list(
-                part='contentDetails,statistics',
-                id=video_id
-            ).execute()
+            with self._pooled_http() as http:
+                response = self.youtube.videos().list(
+                    part='contentDetails,statistics',
+                    id=video_id
+                ).execute(http=http)
             
             if not response['items']:
                 return {}
@@ -194,17 +270,33 @@ class YouTubeExtractor:
             languages: List of preferred languages
             
         Returns:
-            Transcript text or None if not available
+            Transcript text (capped at MAX_TRANSCRIPT_CHARS) or None if not available
+        """
+        return self._fetch_transcript(video_id, languages)[0]
+    
+    def _fetch_transcript(self, video_id: str, languages: List[str] = ['en']) -> Tuple[Optional[str], int]:
+        """Get video transcript if available, along with its full length.
+        
+        Args:
+            video_id: YouTube video ID
+            languages: List of preferred languages
+            
+        Returns:
+            Transcript text (capped at MAX_TRANSCRIPT_CHARS) or None if not available,
+            and the length of the whole transcript before capping (0 if not available)
         """
         try:
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+            if TranscriptListFetcher is not None:
+                transcript_list = TranscriptListFetcher(self.session).fetch(video_id)
+            else:
+                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
             
             # Try to get transcript in preferred languages
             for language in languages:
                 try:
                     transcript = transcript_list.find_transcript([language])
                     transcript_data = transcript.fetch()
-                    return self.formatter.format_transcript(transcript_data)
+                    return self._format_transcript(transcript_data)
                 except Exception:
                     continue
             
@@ -212,7 +304,7 @@ class YouTubeExtractor:
             try:
                 transcript = transcript_list.find_generated_transcript(['en'])
                 transcript_data = transcript.fetch()
-                return self.formatter.format_transcript(transcript_data)
+                return self._format_transcript(transcript_data)
             except Exception:
                 pass
             
@@ -220,21 +312,43 @@ class YouTubeExtractor:
             try:
                 transcript = transcript_list.find_transcript(transcript_list._transcript_data.keys())
                 transcript_data = transcript.fetch()
-                return self.formatter.format_transcript(transcript_data)
+                return self._format_transcript(transcript_data)
             except Exception:
                 pass
                 
-            return None
+            return None, 0
         except Exception as e:
             logger.warning(f"Could not get transcript for video {video_id}: {e}")
-            return None
+            return None, 0
+    
+    def _format_transcript(self, transcript_data) -> Tuple[str, int]:
+        """Join transcript snippets into text, keeping only the first MAX_TRANSCRIPT_CHARS.
+        
+        Args:
+            transcript_data: Fetched transcript snippets
+            
+        Returns:
+            Transcript text, capped at MAX_TRANSCRIPT_CHARS characters, and the length
+            of the whole joined transcript
+        """
+        lines = []
+        length = 0
+        for snippet in transcript_data:
+            text = snippet['text'] if isinstance(snippet, dict) else snippet.text
+            if length < MAX_TRANSCRIPT_CHARS:
+                lines.append(text)
+            length += len(text) + 1
+        return '\n'.join(lines)[:MAX_TRANSCRIPT_CHARS], max(length - 1, 0)
     
-    def extract_playlist_data(self, playlist_url: str, max_videos: int = 50) -> Dict:
+    def extract_playlist_data(self, playlist_url: str, max_videos: int = 50,
+                              on_video: Optional[Callable[[Dict], None]] = None) -> Dict:
         """Complete playlist data extraction.
         
         Args:
             playlist_url: YouTube playlist URL
             max_videos: Maximum number of videos to process
+            on_video: Called with each video, in playlist order, as soon as its
+                transcript lookup finishes (lets analysis overlap extraction)
             
         Returns:
             Complete playlist data with videos and transcripts
@@ -254,8 +368,9 @@ class YouTubeExtractor:
         # Get transcripts for videos
         for video in videos:
             logger.info(f"Getting transcript for video: {video['title']}")
-            transcript = self.get_video_transcript(video['video_id'])
-            video['transcript'] = transcript
+            video['transcript'], video['transcript_length'] = self._fetch_transcript(video['video_id'])
+            if on_video is not None:
+                on_video(video)
         
         playlist_data = {
             'playlist_info': playlist_info,
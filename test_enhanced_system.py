@@ -4,18 +4,16 @@
 import os
 import sys
 import json
+from pathlib import Path
 from dotenv import load_dotenv
 
-# Add src directory to path
-sys.path.append('src')
-
 # Load environment variables
 load_dotenv()
 
 def test_enhanced_analyzer():
     """Test the enhanced content analyzer."""
-    from enhanced_content_analyzer import EnhancedContentAnalyzer
-    from youtube_extractor import YouTubeExtractor
+    from src.enhanced_content_analyzer import EnhancedContentAnalyzer
+    from src.youtube_extractor import YouTubeExtractor
     
     # Check for API keys
     youtube_api_key = os.getenv('YOUTUBE_API_KEY')
@@ -97,14 +95,14 @@ def test_api_format():
     """Test that the course structure matches the expected JSON format."""
     print("\n🔍 Testing API format compliance...")
     
-    # Check if test file exists
-    if not os.path.exists("test_enhanced_course.json"):
-        print("❌ Test file not found. Run basic test first.")
+    # Check the test file exists and isn't a zero-byte leftover from a crashed run
+    course_file = Path("test_enhanced_course.json")
+    if not course_file.is_file() or course_file.stat().st_size == 0:
+        print("❌ Test file not found or empty. Run basic test first.")
         return False
     
     try:
-        with open("test_enhanced_course.json", 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json.loads(course_file.read_bytes())
         
         # Check required top-level keys
         required_keys = ['course', 'modules', 'assignments', 'finalExam', 'generatedAt']
@@ -0,0 +1,25 @@
+"""WSGI Entry Point
+
+Production entry point for the web app, e.g.:
+
+    gunicorn -k gevent -w 4 --worker-connections 256 wsgi:app
+"""
+
+# Patch blocking IO before Flask and the API clients are imported, so each
+# request's YouTube/Gemini/Firebase calls yield to the other requests
+try:
+    from gevent import monkey
+    monkey.patch_all()
+    
+    # gRPC (used by the Gemini and Firestore clients) needs its own gevent hook
+    try:
+        import grpc.experimental.gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+    except ImportError:
+        pass
+except ImportError:
+    pass
+
+from app import app  # noqa: E402
+
+__all__ = ['app']